@@ -0,0 +1,199 @@
+# batch.py
+"""
+Génération de prompts en lot, sans interface.
+
+Entrée : JSONL (un spec par ligne), fichier ou stdin.
+    {"kind": "character", "style": "Dark Fantasy (B/W)", "Race": "Elf", "Head Hair": ["Long Hair"], ...}
+    {"kind": "monster", "Species": "Goblin", "Size class": "Small", ...}
+    {"kind": "group", "action": "Duel", ..., "items": [
+        {"type": "monster", "label": "Goblin", "text": "...", "weight": 3},
+        {"kind": "character", "Race": "Elf", "weight": 5}        # rendu à la volée
+    ]}                                  # membres identiques regroupés ("count", "6× Goblin")
+Sortie : JSONL {"line": n, "kind": ..., "label": ..., "prompt": ...} ou texte brut (--format text).
+
+Usage :
+    python batch.py specs.jsonl -o prompts.jsonl --workers 4
+    cat specs.jsonl | python batch.py --format text
+    python batch.py specs.jsonl --validate        # signale les specs qui contredisent les règles
+    python batch.py specs.jsonl --cache prompts.cache.json   # cache de prompts conservé entre deux lancements
+    python batch.py specs.jsonl --library prompts.sqlite3    # prompts ajoutés à la bibliothèque (onglet Library)
+    python batch.py specs.jsonl --dedupe 0.85 --dedupe-index seen.mhx   # quasi-doublons écartés (neardup.py)
+"""
+import itertools
+import json
+import sys
+
+from engine import STYLES, character_label, monster_label, cluster_items
+from promptcache import CACHE, character_prompt, monster_prompt, group_prompt
+
+
+# ---------- rendering ----------
+def _group_item(it, styles_map):
+    """Item de roster : tel quel s'il a un 'text', sinon rendu depuis son spec."""
+    if "text" in it:
+        return {"type": it.get("type", "character"), "label": it.get("label", "Character"),
+                "text": it["text"], "weight": int(it.get("weight", 3)), "count": int(it.get("count", 1))}
+    kind = it.get("kind", "character")
+    if kind == "monster":
+        label, text = monster_label(it), monster_prompt(it, styles_map)
+    else:
+        label, text = character_label(it), character_prompt(it, styles_map)
+    return {"type": kind, "label": it.get("label") or label, "text": text,
+            "weight": int(it.get("weight", 3)), "count": int(it.get("count", 1))}
+
+def render(spec, styles_map=STYLES):
+    """spec -> (kind, label, prompt). Même texte que le bouton Generate du formulaire."""
+    kind = spec.get("kind", "character")
+    if kind == "character":
+        return kind, character_label(spec), character_prompt(spec, styles_map)
+    if kind == "monster":
+        return kind, monster_label(spec), monster_prompt(spec, styles_map)
+    if kind == "group":
+        items = cluster_items([_group_item(it, styles_map) for it in spec.get("items", [])])
+        return kind, spec.get("label", "Group"), group_prompt(spec, items, styles_map)
+    raise ValueError(f"Unknown kind: {kind!r}")
+
+_validator = None
+
+def conflicts(spec):
+    """Conflits de règles d'un spec character (rules.py, chargé à la première demande)."""
+    global _validator
+    if spec.get("kind", "character") != "character": return []
+    if _validator is None:
+        from rules import Validator
+        _validator = Validator()
+    return [] if _validator.valid(spec) else _validator.explain(spec)
+
+def _render_line(job):
+    """Worker : (n° de ligne, texte JSON, valider ?, num_perm) -> dict résultat (ou erreur).
+    num_perm > 0 : la signature MinHash est calculée ici, dans le worker (clé "sig", retirée avant écriture)."""
+    n, raw, validate, num_perm = job
+    try:
+        spec = json.loads(raw)
+        kind, label, prompt = render(spec)
+        res = {"line": n, "kind": kind, "label": label, "prompt": prompt}
+        if validate:
+            found = conflicts(spec)
+            if found: res["conflicts"] = found
+        if num_perm:
+            from neardup import signature
+            res["sig"] = signature(prompt, num_perm)
+        return res
+    except Exception as e:
+        return {"line": n, "error": f"{type(e).__name__}: {e}"}
+
+
+# ---------- streaming ----------
+def _jobs(stream, validate=False, num_perm=0):
+    for n, raw in enumerate(stream, 1):
+        if raw.strip():
+            yield n, raw, validate, num_perm
+
+def _chunks(it, size):
+    """Découpe un itérateur en listes de taille bornée (mémoire constante)."""
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk: return
+        yield chunk
+
+def run(stream, out, workers=1, fmt="jsonl", chunk_size=256, err=sys.stderr, validate=False, library=None,
+        dedupe=None):
+    """
+    Lit les specs au fil de l'eau et écrit les prompts dans l'ordre d'entrée. Renvoie le nb d'erreurs.
+    validate : les specs character en conflit avec les règles (rules.py) sont signalées sur err
+    (et par une clé "conflicts" en JSONL) mais rendues quand même.
+    library : library.PromptLibrary où enregistrer aussi les prompts (une transaction par tranche).
+    dedupe : neardup.NearDupIndex ; un prompt trop proche d'un prompt déjà produit (dans ce lot ou,
+    index persistant, un lot précédent) est signalé sur err et n'est ni écrit ni enregistré.
+    """
+    errors = 0
+    pool = None
+    if workers > 1:
+        from multiprocessing import Pool       # importé seulement ici : server.py / sampler.py n'en ont pas besoin
+        pool = Pool(workers)
+    num_perm = dedupe.num_perm if dedupe is not None else 0
+    try:
+        # Pool.imap consomme toute l'entrée d'avance : on lui donne des tranches bornées.
+        for chunk in _chunks(_jobs(stream, validate, num_perm), chunk_size * max(1, workers)):
+            results = pool.map(_render_line, chunk, chunksize=chunk_size) if pool else list(map(_render_line, chunk))
+            if dedupe is not None:
+                # dans le processus principal, dans l'ordre d'entrée : le premier de deux quasi-doublons gagne
+                for res in results:
+                    if "error" in res: continue
+                    sig = res.pop("sig")
+                    found = dedupe.query(None, sig=sig)
+                    if found:
+                        key, sim = found[0]
+                        res["error"] = res["duplicate"] = f"near-duplicate of {key['label']} (line {key['line']}, {sim:.0%})"
+                    else:
+                        dedupe.add({"line": res["line"], "label": res["label"]}, None, sig=sig)
+                dedupe.flush()
+            if library is not None:
+                library.add_many((r["kind"], r["label"], r["prompt"], json.loads(job[1]))
+                                 for job, r in zip(chunk, results) if "error" not in r)
+            for res in results:
+                if "duplicate" in res:
+                    print(f"line {res['line']}: {res['duplicate']}", file=err)
+                    continue
+                if "error" in res:
+                    errors += 1
+                    print(f"line {res['line']}: {res['error']}", file=err)
+                    continue
+                if "conflicts" in res:
+                    print(f"line {res['line']}: conflicts: {'; '.join(res['conflicts'])}", file=err)
+                if fmt == "text":
+                    out.write(res["prompt"] + "\n")
+                else:
+                    out.write(json.dumps(res, ensure_ascii=False) + "\n")
+            out.flush()
+    finally:
+        if pool:
+            pool.close(); pool.join()
+    return errors
+
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description="Generate prompts from JSONL specs (character / monster / group).")
+    ap.add_argument("input", nargs="?", default="-", help="JSONL file, or '-' for stdin (default)")
+    ap.add_argument("-o", "--output", default="-", help="output file, or '-' for stdout (default)")
+    ap.add_argument("-w", "--workers", type=int, default=1, help="worker processes (default 1 = in-process)")
+    ap.add_argument("--format", choices=["jsonl", "text"], default="jsonl", help="output format (default jsonl)")
+    ap.add_argument("--chunk-size", type=int, default=256, help="specs per worker task (default 256)")
+    ap.add_argument("--validate", action="store_true", help="flag character specs that break the compatibility rules")
+    ap.add_argument("--cache", help="prompt cache file, loaded before and saved after the run "
+                                    "(with --workers > 1 only the main process's renders are saved)")
+    ap.add_argument("--library", help="also store the prompts in this SQLite prompt library")
+    ap.add_argument("--dedupe", type=float, metavar="THRESHOLD",
+                    help="skip prompts at least this similar (0-1, e.g. 0.85) to one already produced")
+    ap.add_argument("--dedupe-index", metavar="PATH",
+                    help="near-duplicate index file kept across runs (with --dedupe; its threshold wins)")
+    args = ap.parse_args(argv)
+    dedupe = None
+    if args.dedupe is not None or args.dedupe_index:
+        from neardup import NearDupIndex
+        dedupe = NearDupIndex(0.85 if args.dedupe is None else args.dedupe, path=args.dedupe_index)
+    library = None
+    if args.library:
+        from library import PromptLibrary
+        library = PromptLibrary(args.library)
+    if args.cache:
+        CACHE.path = args.cache
+        CACHE.load()
+
+    src = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        errors = run(src, dst, workers=args.workers, fmt=args.format, chunk_size=args.chunk_size, validate=args.validate,
+                     library=library, dedupe=dedupe)
+    finally:
+        if src is not sys.stdin: src.close()
+        if dst is not sys.stdout: dst.close()
+        if library is not None: library.close()
+        if dedupe is not None: dedupe.close()
+    if args.cache: CACHE.save()
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
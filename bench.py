@@ -0,0 +1,556 @@
+# bench.py
+"""
+Micro-benchmarks du moteur de prompts (les mesures Tk sont sautées sans écran).
+
+    python bench.py            -> tous les benchmarks
+    python bench.py render     -> seulement ceux nommés
+    python bench.py importtime -> code de sortie 1 si un import sans interface dépasse son budget
+"""
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+import engine
+from engine import STYLES
+from specspace import character_space, monster_space
+from vocab import VOCAB
+
+BENCHES = {}
+
+def bench(fn):
+    BENCHES[fn.__name__[len("bench_"):]] = fn
+    return fn
+
+def timed(fn, *args, repeat=3):
+    """Meilleur temps (s) sur `repeat` exécutions."""
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter(); fn(*args); best = min(best, time.perf_counter() - t)
+    return best
+
+def random_specs(space, n, seed=0):
+    rng = random.Random(seed)
+    return [space[rng.randrange(space.size)] for _ in range(n)]
+
+
+# ---------- reference builders (avant les plans compilés) ----------
+# Copie du moteur d'origine, accès aux champs compris : la comparaison ne dépend pas de engine
+# (seuls les presets de race viennent du registre, data/race_presets.json).
+def _ref_single(spec, key):
+    """Valeur d'un champ simple, None si vide ou '— (leave empty) —'."""
+    v = spec.get(key)
+    if not v: return None
+    v = str(v).strip()
+    return None if not v or v.startswith("—") else v
+
+def _ref_multi(spec, key):
+    return [v for v in (spec.get(key) or []) if v]
+
+def _ref_intro(spec, styles_map):
+    return styles_map.get(spec.get("style"), next(iter(styles_map.values())))
+
+def ref_character_lines(spec, styles_map):
+    intro = _ref_intro(spec, styles_map)
+    lines = [intro]
+
+    race = _ref_single(spec, "Race"); gender = _ref_single(spec, "Gender"); role = _ref_single(spec, "Role / Class")
+    preset = engine.RACE_PRESETS.get(race) if race else None
+    race_lines = list(preset.get("lines", [])) if preset else []
+    race_avoid = preset.get("avoid", "") if preset else ""
+    parts = [x for x in [race, gender, role] if x]
+    lines.append(f"The subject is a {' '.join(parts)}." if parts else "The subject is a character.")
+    if race_lines: lines.extend(race_lines)
+
+    age = _ref_single(spec, "Age"); expr = _ref_single(spec, "Facial Expression")
+    segs = []
+    if age: segs.append(f"approximately {age}")
+    if expr: segs.append(f"with {expr}")
+    if segs: lines.append(", ".join(segs) + ".")
+
+    pose = _ref_single(spec, "Pose / Action Beat")
+    gaze = _ref_single(spec, "Gaze Direction")
+    cam  = _ref_single(spec, "Camera / Lens")
+    if pose: lines.append(f"Pose/action: {pose}.")
+    if gaze: lines.append(f"Gaze: {gaze}.")
+    if cam:  lines.append(f"Camera/lens: {cam}.")
+
+    stat = _ref_single(spec, "Stature"); build = _ref_single(spec, "Build / Body Type")
+    sb = []
+    if stat: sb.append(f"stature: {stat}")
+    if build: sb.append(f"build: {build}")
+    if sb: lines.append("Body: " + ", ".join(sb) + ".")
+
+    beauty = _ref_single(spec, "Attractiveness")
+    if beauty: lines.append(f"Overall attractiveness: {beauty}.")
+    if beauty and (beauty.startswith("Attractive") or beauty.startswith("Striking") or beauty.startswith("Ethereal")):
+        lines.append("Avoid losing racial markers due to beautification.")
+    if spec.get("gritty", True):
+        lines.append("Use gritty realism; avoid beauty portrait, glam makeup, and skin smoothing.")
+
+    head_hair   = _ref_multi(spec, "Head Hair")
+    facial_hair = _ref_multi(spec, "Facial Hair")
+    body_hair   = _ref_multi(spec, "Body Hair")
+    if head_hair:   lines.append(f"Head hair: {', '.join(head_hair)}.")
+    if facial_hair: lines.append(f"Facial hair: {', '.join(facial_hair)}.")
+    if body_hair:   lines.append(f"Body hair: {', '.join(body_hair)}.")
+
+    traits = _ref_multi(spec, "Head/Face Traits") + _ref_multi(spec, "Body Traits")
+    if traits: lines.append(f"Notable features include {', '.join(traits)}.")
+
+    clothes = _ref_multi(spec, "Clothing / Armor"); acc = _ref_multi(spec, "Accessories")
+    if clothes and acc: lines.append(f"They wear {', '.join(clothes)}, along with {', '.join(acc)}.")
+    elif clothes: lines.append(f"They wear {', '.join(clothes)}.")
+    elif acc: lines.append(f"They carry {', '.join(acc)}.")
+
+    # Colors
+    col_parts = []
+    for key, label in [("Hair Color","hair"),("Eye Color","eyes"),("Skin Tone","skin"),
+                       ("Clothing Palette","clothing"),("Accents / Metals","accents/metals")]:
+        val = _ref_single(spec, key)
+        if val: col_parts.append(f"{label} — {val}")
+    if col_parts:
+        if "black-and-white" in intro.lower() or "monochrome" in intro.lower():
+            lines.append("Color cues (use as tonal accents in monochrome): " + "; ".join(col_parts) + ".")
+        else:
+            lines.append("Color palette: " + "; ".join(col_parts) + ".")
+
+    bg = _ref_single(spec, "Background / Ambience")
+    if bg: lines.append(f"The scene is set against a {bg} background.")
+    cadr = _ref_multi(spec, "Framing")
+    if cadr: lines.append(f"Shown from {', '.join(cadr)}.")
+
+    if spec.get("energy", True):
+        if not pose: lines.append("Pose/action: subtle torso twist with asymmetrical shoulders.")
+        lines.append("Motion cues: strands of hair in motion, cloak flutter.")
+        lines.append("Environmental motion: drifting dust motes / faint embers in air.")
+
+    if race_avoid: lines.append(f"Avoid: {race_avoid}")
+    return lines
+
+def ref_monster_lines(spec, styles_map):
+    intro = _ref_intro(spec, styles_map)
+    lines = [intro]
+
+    parts = [_ref_single(spec, "Species"), _ref_single(spec, "Size class"), _ref_single(spec, "Temperament")]
+    lines.append("Monster: " + ", ".join([p for p in parts if p]) + ".")
+
+    ana  = _ref_multi(spec, "Anatomy")
+    loco = _ref_multi(spec, "Locomotion")
+    beh  = _ref_multi(spec, "Behaviors")
+    if ana:  lines.append(f"Anatomy: {', '.join(ana)}.")
+    if loco: lines.append(f"Locomotion: {', '.join(loco)}.")
+    if beh:  lines.append(f"Behaviors and powers: {', '.join(beh)}.")
+
+    # colors
+    dom = _ref_single(spec, "Dominant color")
+    sec = _ref_single(spec, "Secondary color")
+    cols = []
+    if dom: cols.append(f"dominant — {dom}")
+    if sec: cols.append(f"secondary — {sec}")
+    if cols:
+        if "black-and-white" in intro.lower() or "monochrome" in intro.lower():
+            lines.append("Color cues (for tonal accents): " + "; ".join(cols) + ".")
+        else:
+            lines.append("Color palette: " + "; ".join(cols) + ".")
+
+    bg   = _ref_single(spec, "Background")
+    lit  = _ref_single(spec, "Lighting")
+    pose = _ref_single(spec, "Pose")
+    frm  = _ref_single(spec, "Framing")
+    if bg:   lines.append(f"Background: {bg}.")
+    if lit:  lines.append(f"Lighting: {lit}.")
+    if pose: lines.append(f"Pose: {pose}.")
+    if frm:  lines.append(f"Shown from {frm}.")
+
+    if spec.get("energy", True):
+        lines.append("Add motion cues: debris, dust, splashes or drifting particles appropriate to the biome.")
+
+    return lines
+
+
+# ---------- benchmarks ----------
+@bench
+def bench_render(n=20000):
+    """Plans compilés + registre de styles vs builders de référence (même sortie)."""
+    plain_styles = dict(STYLES)
+    for name, space, new, ref in (
+        ("character", character_space(), engine.build_character_lines, ref_character_lines),
+        ("monster", monster_space(), engine.build_monster_lines, ref_monster_lines),
+    ):
+        specs = random_specs(space, n)
+        for spec in specs[:2000]:
+            assert new(spec, STYLES) == ref(spec, plain_styles), spec
+        t_ref = timed(lambda: [" ".join(ref(s, plain_styles)) for s in specs])
+        t_new = timed(lambda: [" ".join(new(s, STYLES)) for s in specs])
+        print(f"render {name:9s}: reference {n / t_ref:9.0f}/s | compiled {n / t_new:9.0f}/s | x{t_ref / t_new:.2f}")
+
+
+@bench
+def bench_gather(repeat=2000):
+    """Lecture des blocs multi : une BooleanVar par option vs bitset MultiSelection (besoin d'un écran)."""
+    import tkinter as tk
+    from solocharacter import MULTI_OPTIONS
+    from ui import MultiSelection
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"gather: skipped ({e})"); return
+    root.withdraw()
+    rng = random.Random(0)
+    old = {k: [(opt, tk.BooleanVar(root, value=rng.random() < 0.2)) for opt in opts] for k, opts in MULTI_OPTIONS.items()}
+    new = {}
+    for k, opts in MULTI_OPTIONS.items():
+        sel = new[k] = MultiSelection(opts)
+        for i, opt in enumerate(opts):
+            if old[k][i][1].get(): sel.mask |= 1 << i
+    n_vars = sum(len(v) for v in old.values())
+    t_old = timed(lambda: [[[opt for opt, var in items if var.get()] for items in old.values()] for _ in range(repeat)])
+    t_new = timed(lambda: [[sel.selected() for sel in new.values()] for _ in range(repeat)])
+    root.destroy()
+    print(f"gather multi blocks: {n_vars} BooleanVars -> 0 | {t_old / repeat * 1e6:7.1f} us -> {t_new / repeat * 1e6:5.1f} us per generate")
+
+
+@bench
+def bench_roster(sizes=(10, 100, 1000)):
+    """Roster du PromptBus : ajout groupé, accès par id, prompt de groupe (sans Tk)."""
+    from promptbus import PromptBus
+    space = character_space()
+    spec = {"style": next(iter(STYLES)), "action": "Ambush", "location": "Forest"}
+    for n in sizes:
+        texts = [(engine.character_label(s), " ".join(engine.build_character_lines(s, STYLES))) for s in random_specs(space, n)]
+        def fill():
+            bus = PromptBus()
+            with bus.batch():
+                ids = [bus.add_character(label, text) for label, text in texts]
+            return bus, ids
+        bus, ids = fill()
+        t_add = timed(fill)
+        t_get = timed(lambda: [bus.index_of(i) for i in ids])
+        bus.move_down(0)
+        t_move = timed(lambda: bus.move_down(n // 2), repeat=100)
+        t_build = timed(lambda: " ".join(engine.build_group_lines(spec, bus.items, STYLES)))
+        print(f"roster {n:5d}: add {t_add * 1e3:7.2f} ms | index_of {t_get / n * 1e6:5.2f} us | "
+              f"move {t_move * 1e6:5.1f} us | group prompt {t_build * 1e3:7.2f} ms")
+
+
+def sample_roster(n, seed=0):
+    """Roster typique : style de la scène, 2 options au plus par bloc multi, poids 1..9."""
+    rng = random.Random(seed)
+    style = next(iter(STYLES))
+    specs = random_specs(character_space(), n - n // 3, seed) + random_specs(monster_space(), n // 3, seed + 1)
+    items = []
+    for s in specs:
+        s = {k: v[:2] if isinstance(v, list) else v for k, v in s.items()}
+        s["style"] = style
+        build = engine.build_monster_lines if s["kind"] == "monster" else engine.build_character_lines
+        items.append({"type": s["kind"], "label": s["kind"], "text": " ".join(build(s, STYLES)), "weight": rng.randint(1, 9)})
+    return {"style": style}, items
+
+@bench
+def bench_factor(sizes=(5, 20, 100)):
+    """Taille du prompt de groupe avec / sans factorisation des phrases communes."""
+    for n in sizes:
+        spec, items = sample_roster(n)
+        full, factored = engine.factorization_report(spec, items, STYLES)
+        t = timed(lambda: engine.build_group_lines(dict(spec, factorize=True), items, STYLES))
+        print(f"factor {n:4d} members: {full:8,} -> {factored:8,} chars (-{100 * (full - factored) / full:4.1f}%) | {t * 1e3:6.2f} ms")
+
+
+@bench
+def bench_budget(sizes=(10, 100, 1000), budget=2000):
+    """Re-planification du budget de tokens après un changement de poids."""
+    for n in sizes:
+        spec, items = sample_roster(n)
+        rng = random.Random(1)
+        def replan():
+            items[rng.randrange(n)]["weight"] = rng.randint(1, 9)
+            return engine.plan_group_budget(spec, items, STYLES, budget)[1]
+        rep = replan()
+        t = timed(replan, repeat=20)
+        print(f"budget {n:5d} members ({budget} tokens): full ~{engine.estimate_tokens(' '.join(engine.build_group_lines(spec, items, STYLES))):7,} | "
+              f"condensed {len(rep['condensed']):4d} dropped {len(rep['dropped']):4d} | re-plan {t * 1e3:6.2f} ms")
+
+@bench
+def bench_cluster(copies=(1, 6, 20), kinds=5):
+    """Horde de copies identiques : entrées du roster et taille du prompt, regroupé ou non."""
+    from promptbus import PromptBus
+    spec, items = sample_roster(kinds * 3)
+    monsters_ = [it for it in items if it["type"] == "monster"][:kinds]
+    for n in copies:
+        sizes = []
+        for cluster in (False, True):
+            bus = PromptBus(); bus.cluster = cluster
+            with bus.batch():
+                for _ in range(n):
+                    for it in monsters_: bus.add_monster(it["label"], it["text"], it["weight"])
+            sizes.append((len(bus), len(" ".join(engine.build_group_lines(spec, bus.items, STYLES)))))
+        (e0, c0), (e1, c1) = sizes
+        print(f"cluster {kinds} monsters x{n:3d}: entries {e0:4d} -> {e1:2d} | prompt {c0:8,} -> {c1:6,} chars")
+
+
+@bench
+def bench_horde(sizes=(20, 200), repeat=5):
+    """Horde : variantes + rendu + ajout groupé au PromptBus (un seul événement)."""
+    from horde import horde_specs, push_horde
+    from promptbus import PromptBus
+    base = {"style": next(iter(STYLES)), "Species": "Goblin", "Size class": "Small", "Temperament": "Cunning",
+            "Anatomy": ["Claws", "Fangs"], "Pose": "Lunging", "energy": True}
+    for n in sizes:
+        events = []
+        def run():
+            bus = PromptBus(); bus.subscribe(events.append)
+            return bus, push_horde(bus, horde_specs(base, n, seed=n))
+        bus, ids = run()
+        t_specs = timed(lambda: horde_specs(base, n, seed=n), repeat=repeat)
+        t_all = timed(run, repeat=repeat)
+        print(f"horde {n:4d}: specs {t_specs * 1e3:6.2f} ms | specs + render + push {t_all * 1e3:6.2f} ms | "
+              f"{len(bus)} entries for {len(ids)} monsters | {len(events[-1])} events in 1 notification")
+
+
+@bench
+def bench_variations(n=100, k=4):
+    """Variantes par membre : premier rendu vs scène régénérée (membres inchangés, cache par empreinte)."""
+    from variations import MemberVariations, build_group_variations
+    from promptcache import CACHE
+    spec, _ = sample_roster(0)
+    items = []
+    for s in random_specs(character_space(), n):
+        s = dict(s, kind="character")
+        items.append({"type": "character", "label": engine.character_label(s), "weight": 3, "spec": s,
+                      "text": " ".join(engine.build_character_lines(s, STYLES))})
+    mv = MemberVariations(STYLES)
+    t = time.perf_counter(); build_group_variations(spec, items, STYLES, k, 0, mv); t_first = time.perf_counter() - t
+    spec = dict(spec, action="Duel")
+    t_again = timed(lambda: build_group_variations(spec, items, STYLES, k, 0, mv))
+    t_nomemo = timed(lambda: (CACHE.clear(), build_group_variations(spec, items, STYLES, k, 0, MemberVariations(STYLES))))
+    print(f"variations {n} members x{k}: first {t_first * 1e3:6.2f} ms | regenerate {t_again * 1e3:6.2f} ms "
+          f"(no memo {t_nomemo * 1e3:6.2f} ms) | hits {mv.hits} misses {mv.misses}")
+
+
+@bench
+def bench_constrained(n=20000, multi_ps=(0.1, 0.25)):
+    """Tirage sous contraintes (propagation) vs rejet naïf : specs valides par seconde."""
+    import rules
+    rs = rules.RuleSet()
+    for p in multi_ps:
+        sampler = rules.ConstrainedSampler(rs, multi_p=p)
+        t_new = timed(lambda: sampler.sample(n, seed=1), repeat=1)
+        m = max(1, n // 10)
+        t = time.perf_counter(); _specs, draws = rules.rejection_sample(rs, m, seed=1, multi_p=p); t_rej = time.perf_counter() - t
+        print(f"constrained multi_p={p:.2f}: propagation {n / t_new:8.0f}/s | rejection {m / t_rej:8.0f}/s "
+              f"({draws / m:.1f} draws per valid spec) | x{(n / t_new) / (m / t_rej):.1f}")
+
+
+@bench
+def bench_validate(n=50000):
+    """Validation des règles : RuleSet sur dicts vs Validator compilé sur chiffres."""
+    import rules
+    space = character_space()
+    v = rules.Validator(space)
+    specs = rules.ConstrainedSampler(v.rules, multi_p=0.15).sample(n // 2, seed=1) + random_specs(space, n // 2)
+    for s in specs: s["style"] = next(iter(STYLES))
+    digits = [space.encode(s) for s in specs]
+    for s, d in zip(specs[:5000], digits):
+        assert v.valid_digits(d) == v.rules.is_valid(s)
+    t_dict = timed(lambda: [v.rules.is_valid(s) for s in specs], repeat=1)
+    t_bits = timed(lambda: [v.valid_digits(d) for d in digits])
+    print(f"validate: dict {n / t_dict * 60 / 1e6:5.2f} M/min | compiled {n / t_bits * 60 / 1e6:5.2f} M/min "
+          f"| x{t_dict / t_bits:.1f} ({sum(map(v.valid_digits, digits))} valid of {n})")
+
+
+@bench
+def bench_compact(n=100000):
+    """Mémoire par spec : dict de chaînes vs CompactSpec (__slots__ + bytes) vs SpecColumns (array)."""
+    import tracemalloc
+    import rules
+    from compact import character_codec, SpecColumns
+    codec = character_codec()
+    specs = rules.ConstrainedSampler(multi_p=0.15).sample(n, seed=1)
+    for s in specs: s.update(style=next(iter(STYLES)), gritty=True, energy=True)
+    rows = [codec.digits(s) for s in specs]
+
+    def measure(build):
+        tracemalloc.start()
+        obj = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del obj
+        return size / n
+
+    per_dict = measure(lambda: [codec.from_digits(*r) for r in rows])      # dicts neufs, chaînes du vocabulaire partagées
+    per_compact = measure(lambda: [codec.encode(s) for s in specs])
+    def columns():
+        cols = SpecColumns(codec); cols.extend(specs); return cols
+    per_cols = measure(columns)
+    t_enc = timed(lambda: [codec.encode(s) for s in specs[:20000]], repeat=1)
+    packed = [codec.encode(s) for s in specs[:20000]]
+    t_dec = timed(lambda: [codec.decode(c) for c in packed], repeat=1)
+    # textes libres ('Other') au-delà de 65 535 valeurs internées : aller-retour exact, codec et colonnes
+    free = [dict(specs[i % n], Race=f"Custom race {i}", **{"Clothing / Armor": [f"custom cloak {i}"]}) for i in range(70000)]
+    cols = SpecColumns(codec); cols.extend(free)
+    ok = all(codec.decode(codec.encode(s)) == cols[i] for i, s in enumerate(free)) \
+        and all(cols[i]["Race"] == s["Race"] and s["Clothing / Armor"][0] in cols[i]["Clothing / Armor"] for i, s in enumerate(free))
+    print(f"compact {n} specs: dict {per_dict:6.0f} B/spec | CompactSpec {per_compact:5.0f} B/spec | "
+          f"SpecColumns {per_cols:5.0f} B/spec | encode {20000 / t_enc:7.0f}/s decode {20000 / t_dec:7.0f}/s | "
+          f"free text x{len(free)} {'ok' if ok else 'MISMATCH'}")
+    return ok
+
+
+@bench
+def bench_promptcache(n=5000):
+    """Cache de prompts : rendu direct vs premier passage (empreinte + rendu) vs spec déjà vu ; groupe de 100."""
+    import promptcache as pc
+    cache = pc.PromptCache()
+    specs = random_specs(character_space(), n)
+    t_build = timed(lambda: [" ".join(engine.build_character_lines(s, STYLES)) for s in specs], repeat=1)
+    t_miss = timed(lambda: [pc.character_prompt(s, STYLES, cache) for s in specs], repeat=1)
+    t_hit = timed(lambda: [pc.character_prompt(s, STYLES, cache) for s in specs])
+    t_copy = timed(lambda: [pc.character_prompt(dict(s, label="x"), STYLES, cache) for s in specs], repeat=1)
+    spec, items = sample_roster(100)
+    spec = dict(spec, factorize=True)
+    t_group = timed(lambda: engine.build_group_lines(spec, items, STYLES))
+    pc.group_prompt(spec, items, STYLES, cache)
+    t_group_hit = timed(lambda: pc.group_prompt(spec, items, STYLES, cache))
+    st = cache.stats()
+    print(f"promptcache {n} specs: direct {t_build / n * 1e6:5.1f} us | first {t_miss / n * 1e6:5.1f} us | "
+          f"seen {t_hit / n * 1e6:5.1f} us (equal copy {t_copy / n * 1e6:5.1f} us) | "
+          f"group 100: {t_group * 1e3:.2f} ms -> hit {t_group_hit * 1e3:.3f} ms | "
+          f"hits {st['hits']} misses {st['misses']} ({st['bytes'] / 1e6:.1f} MB)")
+
+
+@bench
+def bench_library(n=20000, page=50):
+    """Bibliothèque SQLite : insertion par lots puis recherches (première page et page suivante)."""
+    import tempfile
+    from library import PromptLibrary
+    import promptcache as pc
+    cache = pc.PromptCache(max_bytes=0)
+    rows = [("character", engine.character_label(s), pc.character_prompt(s, STYLES, cache), s)
+            for s in random_specs(character_space(), n * 3 // 4)]
+    rows += [("monster", engine.monster_label(s), pc.monster_prompt(s, STYLES, cache), s)
+             for s in random_specs(monster_space(), n // 4)]
+    with tempfile.TemporaryDirectory() as tmp:
+        lib = PromptLibrary(os.path.join(tmp, "bench.sqlite3"))
+        t = time.perf_counter()
+        for i in range(0, len(rows), 5000): lib.add_many(rows[i:i + 5000])
+        t_insert = time.perf_counter() - t
+        size = os.path.getsize(lib.path)
+        print(f"library {n} prompts: insert {n / t_insert:6.0f}/s | {size / n / 1024:.1f} KiB per prompt")
+        for query, filters in (("half-orc paladins foggy graveyard", {}), ("elven cloak", {}), ("tusks", {}),
+                               ("cloak", {"kind": "monster"}), ("", {"race": "Elf"}), ("", {})):
+            first = lib.search(query, limit=page, **filters)
+            t_first = timed(lambda: lib.search(query, limit=page, **filters), repeat=10)
+            before = first[-1]["id"] if first else None
+            t_next = timed(lambda: lib.search(query, limit=page, before=before, **filters), repeat=10)
+            label = (query + "".join(f" {k}={v}" for k, v in filters.items())).strip()
+            print(f"  {label or '(browse)':36s} page 1 {t_first * 1e3:5.2f} ms | page 2 {t_next * 1e3:5.2f} ms | {len(first)} rows")
+        lib.close()
+
+
+@bench
+def bench_vocab(repeat=200):
+    """Vocabulaire : compilation depuis data/*.json vs artefact compilé à jour (empreinte vérifiée)."""
+    import vocab
+    vocab.load()                       # écrit l'artefact s'il manque
+    t_compiled = timed(vocab.load, repeat=repeat)
+    t_json = timed(lambda: vocab.load(compiled=None), repeat=repeat)
+    n = sum(len(v) for kind in vocab.KINDS for sec in (vocab.VOCAB.single(kind), vocab.VOCAB.multi(kind)) for v in sec.values())
+    print(f"vocab {n} options: compile from JSON {t_json * 1e3:5.2f} ms | compiled artifact {t_compiled * 1e3:5.2f} ms")
+
+
+@bench
+def bench_neardup(n=20000, probes=1000):
+    """Quasi-doublons : signature, insertion, requête LSH vs parcours linéaire ; rappel sur variantes à un accessoire."""
+    import neardup
+    specs = random_specs(character_space(), n)
+    texts = [" ".join(engine.build_character_lines(s, STYLES)) for s in specs]
+    t = time.perf_counter()
+    sigs = [neardup.signature(x) for x in texts]
+    t_sig = (time.perf_counter() - t) / n
+    idx = neardup.NearDupIndex()
+    t = time.perf_counter()
+    for i, sig in enumerate(sigs): idx.add(i, None, sig=sig)
+    t_add = (time.perf_counter() - t) / n
+    rng = random.Random(1)
+    accessories = VOCAB.multi("character")["Accessories"]
+    variants = []
+    for s in specs[:probes]:
+        worn = list(s.get("Accessories") or [])
+        extra = [a for a in accessories if a not in worn]
+        variants.append(neardup.signature(engine.build_character_lines(dict(s, Accessories=worn + [rng.choice(extra)]), STYLES)))
+    t = time.perf_counter()
+    found = sum(any(k == i for k, _ in idx.query(None, sig=sig)) for i, sig in enumerate(variants))
+    t_query = (time.perf_counter() - t) / probes
+    t_scan = timed(lambda: [neardup.similarity(variants[0], s) for s in sigs], repeat=3)
+    print(f"neardup {n} prompts (threshold {idx.threshold}, {idx.bands}x{idx.rows}): signature {t_sig * 1e6:5.0f} us | "
+          f"add {t_add * 1e6:4.1f} us | query {t_query * 1e6:5.1f} us vs linear scan {t_scan * 1e3:6.1f} ms | "
+          f"recall {found / probes:.1%}")
+
+
+@bench
+def bench_optionindex(repeat=200):
+    """Recherche d'options à la frappe : construction de l'index, puis chaque préfixe d'une saisie (µs par frappe)."""
+    from optionindex import OptionIndex
+    t = time.perf_counter()
+    idx = OptionIndex()
+    t_build = time.perf_counter() - t
+    print(f"optionindex {len(idx)} options: build {t_build * 1e3:5.2f} ms")
+    for typed, kw in (("foggy graveyard", {}), ("crossbow", {"kind": "character", "key": "Accessories"}),
+                      ("plate armor", {"kind": "character"}), ("necromncer", {})):
+        keystrokes = [typed[:n] for n in range(1, len(typed) + 1)]
+        per_key = timed(lambda: [idx.search(q, **kw) for q in keystrokes], repeat=repeat) / len(keystrokes)
+        first = idx.search(typed, **kw)[:1]
+        scope = "/".join(kw.values()) or "all"
+        print(f"  {typed!r:18s} {scope:22s} {per_key * 1e6:6.1f} us per keystroke -> {first[0][2] if first else None}")
+
+
+# Modules sans interface (workers, serveur, scripts) : budget d'import en multiples du temps d'import de
+# IMPORT_BASELINE, mesuré dans la même exécution (la machine, sa charge et la version de Python s'annulent).
+# Marge ~2,5x sur les rapports mesurés ; le contrôle principal reste l'absence de module d'interface.
+IMPORT_BASELINE = "json"
+IMPORT_BUDGET = {"engine": 4, "promptcache": 5, "batch": 5, "library": 6, "neardup": 5,
+                 "rules": 5, "horde": 5, "variations": 5, "server": 14}
+GUI_MODULES = ("tkinter", "_tkinter", "ui", "solocharacter", "monsters", "groupcharacter", "libraryview", "main")
+
+def import_profile(module):
+    """Import de `module` dans un interpréteur neuf -> {module importé: (self µs, cumulé µs)}."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    proc = subprocess.run([sys.executable, "-E", "-s", "-X", "importtime", "-c", f"import {module}"],
+                          cwd=here, capture_output=True, text=True, check=True)
+    out = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line: continue
+        own, total, name = line[len("import time:"):].split("|")
+        out.setdefault(name.strip(), (int(own), int(total)))
+    return out
+
+@bench
+def bench_importtime(runs=7):
+    """
+    Temps d'import à froid des modules sans interface (médiane de `runs` processus), rapporté à celui de
+    IMPORT_BASELINE ; False si un module d'interface est importé ou si un budget relatif est dépassé.
+    """
+    def median_ms(module):
+        import_profile(module)                                  # .pyc et vocabulaire compilé à jour
+        profiles = [import_profile(module) for _ in range(runs)]
+        return statistics.median(p[module][1] for p in profiles) / 1e3, profiles[0]
+    base = median_ms(IMPORT_BASELINE)[0]
+    print(f"import {IMPORT_BASELINE:12s} {base:6.1f} ms (baseline)")
+    ok = True
+    for module, budget in IMPORT_BUDGET.items():
+        total, profile = median_ms(module)
+        gui = sorted(m for m in profile if m in GUI_MODULES)
+        over = total > budget * base or gui
+        ok = ok and not over
+        print(f"import {module:12s} {total:6.1f} ms = {total / base:4.1f}x {IMPORT_BASELINE} (budget {budget:2d}x) | "
+              f"{len(profile):3d} modules" + (f" | GUI: {', '.join(gui)}" if gui else "") + ("  <-- OVER" if over else ""))
+    return ok
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHES)
+    failed = [name for name in names if BENCHES[name]() is False]
+    sys.exit(1 if failed else 0)
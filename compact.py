@@ -0,0 +1,166 @@
+# compact.py
+"""
+Représentation compacte des specs pour les gros lots en mémoire.
+
+Un spec est stocké sous forme de chiffres SpecSpace (même codage que specspace / sampler / rules.Validator) :
+    champ simple : 0 = vide, 1..k = option ; k+1+j = texte libre n°j (table d'internement du codec)
+    bloc multi   : masque de bits des options ; les textes libres du bloc vont dans `other`
+    drapeaux     : un bit par drapeau booléen (gritty, energy)
+le tout empaqueté dans un seul objet bytes (struct).
+
+    codec = Codec(character_space())
+    cs = codec.encode(spec)          -> CompactSpec (≈ 220 octets au lieu de quelques Ko)
+    codec.decode(cs)                 -> spec dict (structure des formulaires)
+    cols = SpecColumns(codec); cols.append(spec); cols[i]   -> stockage en colonnes (array)
+"""
+import struct
+from array import array
+
+from specspace import character_space, monster_space
+
+FLAGS = {"character": ("gritty", "energy"), "monster": ("energy",)}
+
+
+class CompactSpec:
+    """Un spec encodé (bytes) ; se décode avec le Codec qui l'a produit."""
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        self.data = data
+
+    def __eq__(self, other):
+        return isinstance(other, CompactSpec) and self.data == other.data
+
+    def __hash__(self):
+        return hash(self.data)
+
+
+class Codec:
+    """spec dict <-> chiffres / CompactSpec pour un SpecSpace donné (tous ses champs)."""
+    def __init__(self, space):
+        self.space = space
+        self.kind = space.kind
+        self.flags = FLAGS.get(space.kind, ())
+        self.fields = space.fields
+        self.single_pos = [i for i, f in enumerate(self.fields) if not f[2]]
+        self.multi_pos = [i for i, f in enumerate(self.fields) if f[2]]
+        for i in self.multi_pos:
+            if len(self.fields[i][1]) > 64:
+                raise ValueError(f"{self.fields[i][0]}: too many options for a 64-bit mask")
+        # singles (I : les textes libres internés dépassent vite 65 535) + masques (Q) + other (I) + drapeaux (B)
+        self._struct = struct.Struct(f"<{len(self.single_pos)}I{len(self.multi_pos)}QIB")
+        self.texts, self._text_ids = [], {}
+        self.others, self._other_ids = [()], {(): 0}
+
+    # ---------- internement ----------
+    def _text(self, s):
+        i = self._text_ids.get(s)
+        if i is None:
+            i = self._text_ids[s] = len(self.texts); self.texts.append(s)
+        return i
+
+    def _other(self, pairs):
+        key = tuple(pairs)
+        i = self._other_ids.get(key)
+        if i is None:
+            i = self._other_ids[key] = len(self.others); self.others.append(key)
+        return i
+
+    # ---------- chiffres ----------
+    def digits(self, spec):
+        """spec -> (chiffres, id other, bits drapeaux) ; accepte les textes libres."""
+        out, extra = [], []
+        for i, (key, options, is_multi, empty, radix, pos) in enumerate(self.fields):
+            v = spec.get(key)
+            if is_multi:
+                d = 0
+                for opt in v or []:
+                    j = pos.get(opt)
+                    if j is None: extra.append((i, opt))
+                    else:         d |= 1 << j
+            elif not v:
+                d = 0 if empty else pos[options[0]]
+            else:
+                j = pos.get(v)
+                d = j + empty if j is not None else radix + self._text(v)
+            out.append(d)
+        flags = 0
+        for b, name in enumerate(self.flags):
+            if spec.get(name, True): flags |= 1 << b
+        return out, self._other(extra) if extra else 0, flags
+
+    def from_digits(self, digits, other=0, flags=0):
+        spec = {"kind": self.kind}
+        spec.update(self.space.base)
+        for (key, options, is_multi, empty, radix, _p), d in zip(self.fields, digits):
+            if is_multi:
+                spec[key] = [options[j] for j in range(len(options)) if d >> j & 1]
+            elif d >= radix:
+                spec[key] = self.texts[d - radix]
+            else:
+                spec[key] = (options[d - 1] if d else None) if empty else options[d]
+        for i, v in self.others[other]:
+            spec[self.fields[i][0]].append(v)
+        for b, name in enumerate(self.flags):
+            spec[name] = bool(flags >> b & 1)
+        return spec
+
+    # ---------- CompactSpec ----------
+    def encode(self, spec):
+        digits, other, flags = self.digits(spec)
+        return CompactSpec(self._struct.pack(*[digits[i] for i in self.single_pos],
+                                             *[digits[i] for i in self.multi_pos], other, flags))
+
+    def unpack(self, cs):
+        vals = self._struct.unpack(cs.data)
+        digits = [0] * len(self.fields)
+        ns = len(self.single_pos)
+        for k, i in enumerate(self.single_pos): digits[i] = vals[k]
+        for k, i in enumerate(self.multi_pos):  digits[i] = vals[ns + k]
+        return digits, vals[-2], vals[-1]
+
+    def decode(self, cs):
+        return self.from_digits(*self.unpack(cs))
+
+
+def character_codec(keys=None, base=None):
+    return Codec(character_space(keys, base=base))
+
+def monster_codec(keys=None, base=None):
+    return Codec(monster_space(keys, base=base))
+
+
+# ---------- stockage en colonnes ----------
+class SpecColumns:
+    """Lot de specs en colonnes array (I par champ simple, Q par bloc multi) : ~145 octets par spec."""
+    def __init__(self, codec):
+        self.codec = codec
+        self.columns = [array("Q" if f[2] else "I") for f in codec.fields]
+        self.other = array("I")
+        self.flags = array("B")
+
+    def __len__(self):
+        return len(self.flags)
+
+    def append(self, spec):
+        digits, other, flags = self.codec.digits(spec)
+        for col, d in zip(self.columns, digits): col.append(d)
+        self.other.append(other); self.flags.append(flags)
+
+    def extend(self, specs):
+        for spec in specs: self.append(spec)
+
+    def digits(self, i):
+        return [col[i] for col in self.columns]
+
+    def __getitem__(self, i):
+        return self.codec.from_digits(self.digits(i), self.other[i], self.flags[i])
+
+    def __iter__(self):
+        for i, digits in enumerate(zip(*self.columns)):
+            yield self.codec.from_digits(digits, self.other[i], self.flags[i])
+
+    def nbytes(self):
+        """Octets des colonnes (hors tables d'internement, partagées par tout le lot)."""
+        cols = self.columns + [self.other, self.flags]
+        return sum(c.itemsize * len(c) for c in cols)
@@ -0,0 +1,530 @@
+# engine.py
+"""
+Moteur de prompts sans Tkinter.
+Prend un "spec" (dict simple) et renvoie les mêmes lignes que les formulaires.
+
+Spec character / monster:
+    {"style": "<clé styles_map>", "<champ simple>": "valeur" | None, "<bloc multi>": ["opt", ...], ...}
+    + drapeaux booléens: "gritty", "energy" (character) / "energy" (monster)
+Spec group:
+    {"style", "action", "location", "theme", "camera", "light",
+     "allow_conflict", "depth", "motion", "factorize", "token_budget"}  + liste d'items du PromptBus
+"""
+import functools
+import hashlib
+import re
+
+from vocab import VOCAB
+
+
+# ---------- styles d'image (partagés par les onglets) ----------
+class Style:
+    """Style de rendu résolu une fois : phrase d'intro + drapeaux précalculés."""
+    __slots__ = ("name", "intro", "monochrome")
+    def __init__(self, name, intro):
+        self.name = name
+        self.intro = intro
+        low = intro.lower()
+        self.monochrome = "black-and-white" in low or "monochrome" in low
+
+class StyleRegistry(dict):
+    """
+    dict nom -> intro (compatible avec l'ancien styles_map des formulaires)
+    + resolve(nom) -> Style, avec repli sur le premier style comme avant.
+    """
+    def __init__(self, styles):
+        super().__init__(styles)
+        self._styles = {name: Style(name, intro) for name, intro in self.items()}
+        self.default = next(iter(self._styles.values()))
+
+    def resolve(self, name):
+        return self._styles.get(name, self.default)
+
+def as_registry(styles_map):
+    return styles_map if isinstance(styles_map, StyleRegistry) else StyleRegistry(styles_map)
+
+STYLES = StyleRegistry({
+    "Dark Fantasy (B/W)": "A black-and-white, highly detailed portrait in dark fantasy or gothic style, charcoal or ink rendering.",
+    "Heroic Fantasy (color)": "A vibrant, full-color heroic fantasy character portrait, painted illustration.",
+    "Photorealistic": "A photorealistic portrait with shallow depth of field (85mm lens), high dynamic range.",
+    "Anime / Manga": "An anime-style character portrait with clean lineart and cel shading.",
+    "Soft Watercolor": "A soft watercolor illustration with light washes and paper texture.",
+    "Oil Painting": "An oil painting portrait with rich brush strokes and dramatic lighting.",
+    "Steampunk": "A steampunk character portrait with brass fittings, gears, and Victorian aesthetics.",
+    "Neon Cyberpunk": "A neon-lit cyberpunk portrait with moody atmosphere and futuristic city glow.",
+    "Etching": "A monochrome copperplate etching style with fine cross-hatching.",
+    "Cinematic Concept Art": "A cinematic concept art portrait, painterly and high detail."
+})
+
+# ---------- race presets ----------
+RACE_PRESETS = VOCAB.race_presets         # data/race_presets.json
+
+# Champs des formulaires (mêmes clés que single_vars / multi_blocks)
+CHARACTER_SINGLE_KEYS = [
+    "Race","Gender","Role / Class","Age","Facial Expression",
+    "Stature","Build / Body Type","Attractiveness",
+    "Hair Color","Eye Color","Skin Tone","Clothing Palette","Accents / Metals",
+    "Background / Ambience","Pose / Action Beat","Gaze Direction","Camera / Lens",
+]
+CHARACTER_MULTI_KEYS = [
+    "Head Hair","Facial Hair","Head/Face Traits","Body Hair","Body Traits",
+    "Clothing / Armor","Accessories","Framing",
+]
+MONSTER_SINGLE_KEYS = [
+    "Species","Size class","Temperament","Dominant color","Secondary color",
+    "Background","Lighting","Pose","Framing",
+]
+MONSTER_MULTI_KEYS = ["Anatomy","Locomotion","Behaviors"]
+GROUP_KEYS = ["style","action","location","theme","camera","light","allow_conflict","depth","motion","factorize","token_budget"]
+
+# Presets précompilés : race -> (lignes, avoid)
+_RACE_RULES = {name: (tuple(p.get("lines", [])), p.get("avoid", "")) for name, p in RACE_PRESETS.items()}
+
+
+# ---------- spec access ----------
+def _single(spec, key):
+    """Valeur d'un champ simple, None si vide ou '— (leave empty) —'."""
+    v = spec.get(key)
+    if not v: return None
+    if v.__class__ is not str: v = str(v)
+    v = v.strip()
+    return v if v and v[0] != "—" else None
+
+def _multi(spec, key):
+    vals = spec.get(key)
+    if not vals or (vals.__class__ is list and all(vals)): return vals     # cas courant : liste déjà propre
+    return [v for v in vals if v]
+
+
+# ---------- compiled render plans ----------
+# Une règle = tuple déclaratif ; _compile() la transforme une fois en closure step(spec, out, ctx).
+# ctx porte le style résolu. Les règles sont rangées en sections (identity, hair, outfit...) ;
+# chaque section déclare les champs du spec dont elle dépend, ce qui permet de ne recalculer
+# que les sections touchées (voir SectionRenderer).
+def _op_single(key, prefix, suffix="."):
+    def step(spec, out, ctx):
+        v = _single(spec, key)
+        if v: out.append(prefix + v + suffix)
+    return step
+
+def _op_multi(key, prefix, suffix="."):
+    def step(spec, out, ctx):
+        v = _multi(spec, key)
+        if v: out.append(prefix + ", ".join(v) + suffix)
+    return step
+
+def _op_flag(key, *text):
+    def step(spec, out, ctx):
+        if spec.get(key, True): out.extend(text)
+    return step
+
+def _op_palette(pairs, mono_prefix, color_prefix):
+    pairs = tuple((key, label + " — ") for key, label in pairs)
+    def step(spec, out, ctx):
+        cols = []
+        for key, label in pairs:
+            v = _single(spec, key)
+            if v: cols.append(label + v)
+        if cols:
+            out.append((mono_prefix if ctx["style"].monochrome else color_prefix) + "; ".join(cols) + ".")
+    return step
+
+def _op_call(fn):
+    return fn
+
+_OPS = {"single": _op_single, "multi": _op_multi, "flag": _op_flag, "palette": _op_palette, "call": _op_call}
+
+def _compile(rules):
+    return tuple(_OPS[r[0]](*r[1:]) for r in rules)
+
+def _run(plan, spec, styles_map, ctx=None):
+    style = as_registry(styles_map).resolve(spec.get("style"))
+    ctx = ctx if ctx is not None else {}
+    ctx["style"] = style
+    out = [style.intro]
+    for step in plan: step(spec, out, ctx)
+    return out
+
+
+# ---------- character ----------
+def _char_subject(spec, out, ctx):
+    race = _single(spec, "Race"); gender = _single(spec, "Gender"); role = _single(spec, "Role / Class")
+    rule = _RACE_RULES.get(race) if race else None
+    parts = [x for x in (race, gender, role) if x]
+    out.append("The subject is a " + " ".join(parts) + "." if parts else "The subject is a character.")
+    if rule and rule[0]: out.extend(rule[0])
+
+def _char_age(spec, out, ctx):
+    age = _single(spec, "Age"); expr = _single(spec, "Facial Expression")
+    if age and expr: out.append("approximately " + age + ", with " + expr + ".")
+    elif age:        out.append("approximately " + age + ".")
+    elif expr:       out.append("with " + expr + ".")
+
+def _char_body(spec, out, ctx):
+    stat = _single(spec, "Stature"); build = _single(spec, "Build / Body Type")
+    if stat and build: out.append("Body: stature: " + stat + ", build: " + build + ".")
+    elif stat:         out.append("Body: stature: " + stat + ".")
+    elif build:        out.append("Body: build: " + build + ".")
+
+_BEAUTIFIED = ("Attractive", "Striking", "Ethereal")
+def _char_beauty(spec, out, ctx):
+    beauty = _single(spec, "Attractiveness")
+    if beauty:
+        out.append("Overall attractiveness: " + beauty + ".")
+        if beauty.startswith(_BEAUTIFIED): out.append("Avoid losing racial markers due to beautification.")
+
+def _char_traits(spec, out, ctx):
+    traits = (_multi(spec, "Head/Face Traits") or []) + (_multi(spec, "Body Traits") or [])
+    if traits: out.append("Notable features include " + ", ".join(traits) + ".")
+
+def _char_outfit(spec, out, ctx):
+    clothes = _multi(spec, "Clothing / Armor"); acc = _multi(spec, "Accessories")
+    if clothes and acc: out.append("They wear " + ", ".join(clothes) + ", along with " + ", ".join(acc) + ".")
+    elif clothes: out.append("They wear " + ", ".join(clothes) + ".")
+    elif acc: out.append("They carry " + ", ".join(acc) + ".")
+
+def _char_energy(spec, out, ctx):
+    if spec.get("energy", True):
+        if not _single(spec, "Pose / Action Beat"): out.append("Pose/action: subtle torso twist with asymmetrical shoulders.")
+        out.append("Motion cues: strands of hair in motion, cloak flutter.")
+        out.append("Environmental motion: drifting dust motes / faint embers in air.")
+
+def _char_avoid(spec, out, ctx):
+    race = _single(spec, "Race")
+    rule = _RACE_RULES.get(race) if race else None
+    if rule and rule[1]: out.append("Avoid: " + rule[1])
+
+_COLOR_KEYS = [("Hair Color","hair"),("Eye Color","eyes"),("Skin Tone","skin"),
+               ("Clothing Palette","clothing"),("Accents / Metals","accents/metals")]
+
+# (section, champs dont elle dépend, règles) — dans l'ordre des lignes du prompt
+CHARACTER_SECTIONS = (
+    ("identity", ("Race", "Gender", "Role / Class", "Age", "Facial Expression"), (
+        ("call", _char_subject),
+        ("call", _char_age),
+    )),
+    ("camera", ("Pose / Action Beat", "Gaze Direction", "Camera / Lens"), (
+        ("single", "Pose / Action Beat", "Pose/action: "),
+        ("single", "Gaze Direction", "Gaze: "),
+        ("single", "Camera / Lens", "Camera/lens: "),
+    )),
+    ("body", ("Stature", "Build / Body Type", "Attractiveness", "gritty"), (
+        ("call", _char_body),
+        ("call", _char_beauty),
+        ("flag", "gritty", "Use gritty realism; avoid beauty portrait, glam makeup, and skin smoothing."),
+    )),
+    ("hair", ("Head Hair", "Facial Hair", "Body Hair", "Head/Face Traits", "Body Traits"), (
+        ("multi", "Head Hair", "Head hair: "),
+        ("multi", "Facial Hair", "Facial hair: "),
+        ("multi", "Body Hair", "Body hair: "),
+        ("call", _char_traits),
+    )),
+    ("outfit", ("Clothing / Armor", "Accessories"), (
+        ("call", _char_outfit),
+    )),
+    ("colors", ("style",) + tuple(k for k, _l in _COLOR_KEYS), (
+        ("palette", _COLOR_KEYS, "Color cues (use as tonal accents in monochrome): ", "Color palette: "),
+    )),
+    ("scene", ("Background / Ambience", "Framing"), (
+        ("single", "Background / Ambience", "The scene is set against a ", " background."),
+        ("multi", "Framing", "Shown from "),
+    )),
+    ("motion", ("energy", "Pose / Action Beat"), (
+        ("call", _char_energy),
+    )),
+    ("avoid", ("Race",), (
+        ("call", _char_avoid),
+    )),
+)
+CHARACTER_RULES = tuple(r for _name, _deps, rules in CHARACTER_SECTIONS for r in rules)
+CHARACTER_PLAN = _compile(CHARACTER_RULES)
+
+def build_character_lines(spec, styles_map):
+    return _run(CHARACTER_PLAN, spec, styles_map)
+
+def character_label(spec):
+    parts = [p for p in [_single(spec, "Race"), _single(spec, "Gender"), _single(spec, "Role / Class")] if p]
+    return "Character" if not parts else " ".join(parts)
+
+
+# ---------- monster ----------
+def _monster_identity(spec, out, ctx):
+    parts = [p for p in (_single(spec, "Species"), _single(spec, "Size class"), _single(spec, "Temperament")) if p]
+    out.append("Monster: " + ", ".join(parts) + ".")
+
+MONSTER_SECTIONS = (
+    ("identity", ("Species", "Size class", "Temperament"), (
+        ("call", _monster_identity),
+    )),
+    ("anatomy", ("Anatomy", "Locomotion", "Behaviors"), (
+        ("multi", "Anatomy", "Anatomy: "),
+        ("multi", "Locomotion", "Locomotion: "),
+        ("multi", "Behaviors", "Behaviors and powers: "),
+    )),
+    ("colors", ("style", "Dominant color", "Secondary color"), (
+        ("palette", [("Dominant color","dominant"),("Secondary color","secondary")],
+         "Color cues (for tonal accents): ", "Color palette: "),
+    )),
+    ("scene", ("Background", "Lighting", "Pose", "Framing"), (
+        ("single", "Background", "Background: "),
+        ("single", "Lighting", "Lighting: "),
+        ("single", "Pose", "Pose: "),
+        ("single", "Framing", "Shown from "),
+    )),
+    ("motion", ("energy",), (
+        ("flag", "energy", "Add motion cues: debris, dust, splashes or drifting particles appropriate to the biome."),
+    )),
+)
+MONSTER_RULES = tuple(r for _name, _deps, rules in MONSTER_SECTIONS for r in rules)
+MONSTER_PLAN = _compile(MONSTER_RULES)
+
+def build_monster_lines(spec, styles_map):
+    return _run(MONSTER_PLAN, spec, styles_map)
+
+def monster_label(spec):
+    return _single(spec, "Species") or "Monster"
+
+
+# ---------- rendu incrémental par section ----------
+class SectionRenderer:
+    """
+    Rendu par sections avec cache : une section n'est recalculée que si l'un de ses champs a changé
+    (comparaison des valeurs, pas de hachage). Sert à l'aperçu live des formulaires.
+    """
+    def __init__(self, sections, styles_map):
+        self.styles = as_registry(styles_map)
+        self.sections = [(name, deps, _compile(rules)) for name, deps, rules in sections]
+        self.key_sections = {}
+        for name, deps, _rules in sections:
+            for k in deps: self.key_sections.setdefault(k, []).append(name)
+        self._cache = {}   # section -> (valeurs des deps, lignes)
+        self.hits = self.misses = 0
+
+    def sections_for(self, keys):
+        return {name for k in keys for name in self.key_sections.get(k, ())}
+
+    def render(self, spec):
+        style = self.styles.resolve(spec.get("style"))
+        ctx = {"style": style}
+        lines = [style.intro]
+        for name, deps, plan in self.sections:
+            values = tuple(spec.get(k) for k in deps)
+            cached = self._cache.get(name)
+            if cached and cached[0] == values:
+                self.hits += 1
+            else:
+                self.misses += 1
+                out = []
+                for step in plan: step(spec, out, ctx)
+                cached = self._cache[name] = (values, out)
+            lines.extend(cached[1])
+        return lines
+
+
+# ---------- group ----------
+_ROSTER_HEADER = "Individuals (in composition order; higher weight = more visual priority):"
+_DETAIL_SEP = "—— Individual detailed prompts ——"
+
+def member_label(it):
+    """Label d'un membre, préfixé de sa multiplicité ("6× Goblin") pour un groupe de copies."""
+    n = it.get("count", 1)
+    return f"{n}× {it['label']}" if n > 1 else it["label"]
+
+def _roster_line(i, it):
+    role = "Character" if it["type"] == "character" else "Monster"
+    return f"{i:02d}. [{role}] weight {it['weight']} — {member_label(it)}."
+
+def build_group_lines(spec, items, styles_map):
+    lines = [as_registry(styles_map).resolve(spec.get("style")).intro]
+
+    lines.append(f"Group scene: {spec.get('action', 'Idle pose')} at {spec.get('location', 'Plain Dark Background')}, "
+                 f"theme {spec.get('theme', 'Epic').lower()}.")
+    lines.append(f"Camera: {spec.get('camera', 'Wide shot (24–35mm)')}. Lighting: {spec.get('light', 'Volumetric rays')}.")
+
+    if spec.get("depth", True):  lines.append("Use strong depth cues: foreground/midground/background layers and tasteful overlaps.")
+    if spec.get("motion", True): lines.append("Add subtle motion: cloth/hair in motion, drifting dust or embers.")
+
+    if spec.get("allow_conflict", True):
+        lines.append("If monsters and characters are present, allow direct conflict and clear opposing body language.")
+
+    # Individuals
+    if not items:
+        lines.append("No individuals selected.")
+        return lines
+
+    budget = spec.get("token_budget")
+    if budget:
+        items = plan_group_budget(spec, items, styles_map, budget)[0]
+
+    lines.append(_ROSTER_HEADER)
+    for i, it in enumerate(items, 1):
+        lines.append(_roster_line(i, it))
+    if spec.get("factorize", False):
+        _append_factored(lines, items)
+        return lines
+    # Append their prompts (full text) after a separator
+    lines.append(_DETAIL_SEP)
+    for it in items:
+        if not it.get("dropped"): lines.append(f"[{member_label(it)}] {it['text']}")
+
+    return lines
+
+
+# ---------- group : phrases communes ----------
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+def split_sentences(text):
+    return [p for p in _SENTENCE_END.split(text.strip()) if p]
+
+def factor_shared(texts, known=()):
+    """
+    Phrases répétées d'un texte à l'autre -> (shared, own)
+      shared : [(indices des textes, [phrases])], un groupe par ensemble de textes, ordre d'apparition
+      own    : phrases propres à chaque texte (ordre conservé)
+    Les phrases de `known` (déjà dites au niveau scène) disparaissent ; un groupe n'est
+    factorisé que s'il raccourcit le total.
+    """
+    known = set(known)
+    split = [split_sentences(t) for t in texts]
+    owners = {}
+    for i, sentences in enumerate(split):
+        for p in sentences:
+            o = owners.setdefault(p, [])
+            if not o or o[-1] != i: o.append(i)
+    groups = {}
+    for p, o in owners.items():
+        if p not in known and len(o) > 1:
+            groups.setdefault(tuple(o), []).append(p)
+    shared, drop = [], set(known)
+    for o, sentences in groups.items():
+        size = sum(len(p) + 1 for p in sentences)
+        if (len(o) - 1) * size > 13 + 4 * len(o):       # coût du préfixe "Individuals 01, 02: "
+            shared.append((o, sentences)); drop.update(sentences)
+    own = [[p for p in sentences if p not in drop] for sentences in split]
+    return shared, own
+
+def _append_factored(lines, items):
+    known = [p for line in lines for p in split_sentences(line)]
+    shared, own = factor_shared([it["text"] for it in items], known)
+    if shared:
+        lines.append("—— Shared details ——")
+        for o, sentences in shared:
+            who = "All individuals" if len(o) == len(items) else "Individuals " + ", ".join(f"{i+1:02d}" for i in o)
+            lines.append(f"{who}: {' '.join(sentences)}")
+    lines.append(_DETAIL_SEP)
+    for i, (it, sentences) in enumerate(zip(items, own), 1):
+        if it.get("dropped"): continue
+        rest = " ".join(sentences) or ("(shared details only)" if it["text"] else "")
+        lines.append(f"{i:02d} [{member_label(it)}] {rest}")
+
+def factorization_report(spec, items, styles_map):
+    """(taille pleine, taille factorisée) du prompt de groupe, en caractères."""
+    full = " ".join(build_group_lines(dict(spec, factorize=False), items, styles_map))
+    factored = " ".join(build_group_lines(dict(spec, factorize=True), items, styles_map))
+    return len(full), len(factored)
+
+
+# ---------- group : membres identiques ----------
+@functools.lru_cache(maxsize=4096)
+def text_key(kind, text):
+    """
+    Empreinte d'un prompt de membre : phrases normalisées (casse, espaces, ponctuation finale),
+    sans ordre ni doublons -> deux textes quasi identiques ont la même clé.
+    """
+    norm = sorted({" ".join(p.split()).rstrip(".!? ") for p in split_sentences(text.casefold())})
+    return hashlib.blake2b("\0".join([kind] + norm).encode(), digest_size=8).hexdigest()
+
+def cluster_items(items):
+    """Regroupe les membres identiques en une entrée avec "count" (position et poids du premier)."""
+    out, seen = [], {}
+    for it in items:
+        key = text_key(it["type"], it["text"])
+        first = seen.get(key)
+        if first is None:
+            seen[key] = len(out); out.append(it)
+        else:
+            c = out[first] = dict(out[first])
+            c["count"] = c.get("count", 1) + it.get("count", 1)
+    return out
+
+
+# ---------- group : budget de tokens ----------
+_TOKEN_RE = re.compile(r"\w{1,6}|[^\w\s]")
+CONDENSED_SENTENCES = 3       # phrases gardées pour un membre condensé (identité, race / anatomie)
+
+@functools.lru_cache(maxsize=65536)
+def sentence_tokens(sentence):
+    """Estimation du nb de tokens (mots découpés par 6 caractères + ponctuation), en cache."""
+    return len(_TOKEN_RE.findall(sentence))
+
+@functools.lru_cache(maxsize=4096)
+def _text_costs(text):
+    sentences = tuple(split_sentences(text))
+    return sentences, tuple(sentence_tokens(p) for p in sentences)
+
+def estimate_tokens(text):
+    return sum(_text_costs(text)[1])
+
+def plan_group_budget(spec, items, styles_map, budget):
+    """
+    Fait tenir le prompt de groupe dans `budget` tokens (estimés).
+    Les réglages de scène et la liste du roster restent intacts ; par poids croissant
+    (à poids égal, les derniers de la composition d'abord), chaque palier de membres est
+    d'abord condensé (CONDENSED_SENTENCES premières phrases hors style), puis vidé ("dropped" : plus de ligne de détail).
+    Avec "factorize", un membre complet coûte ses phrases propres et le bloc commun est compté une fois ;
+    le total rapporté est alors celui du texte factorisé réellement émis.
+    -> (items planifiés, rapport {"tokens", "budget", "fits", "condensed", "dropped"} en indices)
+    """
+    factorize = spec.get("factorize", False)
+    head_lines = build_group_lines(dict(spec, token_budget=None, factorize=False), [], styles_map)[:-1]
+    head = [estimate_tokens(l) for l in head_lines]
+    known = set(split_sentences(as_registry(styles_map).resolve(spec.get("style")).intro))
+    total = sum(head) + estimate_tokens(_ROSTER_HEADER) + estimate_tokens(_DETAIL_SEP)
+    total += sum(estimate_tokens(_roster_line(i, it)) for i, it in enumerate(items, 1))
+    if factorize:
+        scene = [p for line in head_lines for p in split_sentences(line)]
+        shared, own = factor_shared([it["text"] for it in items], scene)
+        part = [0.0] * len(items)           # bloc commun réparti entre ses membres : vider un membre le réduit
+        for o, sentences in shared:
+            cost = (3 + 2 * len(o) + sum(sentence_tokens(p) for p in sentences)) / len(o)
+            for i in o: part[i] += cost
+        if shared: total += estimate_tokens("—— Shared details ——")
+    full, short = [], []
+    for i, it in enumerate(items):
+        sentences, costs = _text_costs(it["text"])
+        label = sentence_tokens(member_label(it)) + 2 + factorize          # "[label]" (+ "01" factorisé)
+        if factorize and it["text"]:
+            full.append(label + (sum(sentence_tokens(p) for p in own[i]) if own[i] else 6) + part[i])
+        else:
+            full.append(label + sum(costs))
+        kept = [(p, c) for p, c in zip(sentences, costs) if p not in known][:CONDENSED_SENTENCES]
+        short.append((" ".join(p for p, _ in kept), min(label + sum(c for _, c in kept), full[-1])))
+        total += full[-1]
+    order = sorted(range(len(items)), key=lambda i: (items[i]["weight"], -i))
+    base, limit = total, budget
+    for _attempt in range(4):
+        total, level = base, [0] * len(items)               # 0 complet, 1 condensé, 2 vidé
+        tier_start = 0
+        while total > limit and tier_start < len(order):
+            w = items[order[tier_start]]["weight"]
+            tier_end = tier_start
+            while tier_end < len(order) and items[order[tier_end]]["weight"] == w: tier_end += 1
+            for target in (1, 2):
+                for i in order[tier_start:tier_end]:
+                    if total <= limit: break
+                    before = full[i] if level[i] == 0 else short[i][1]
+                    total -= before - (short[i][1] if target == 1 else 0)
+                    level[i] = target
+            tier_start = tier_end
+        planned = [it if lv == 0 else dict(it, text=short[i][0]) if lv == 1 else dict(it, text="", dropped=True)
+                   for i, (it, lv) in enumerate(zip(items, level))]
+        if not factorize: break
+        # le partage change quand des membres sont condensés ou vidés : on mesure le texte émis,
+        # et on replanifie avec une marge si l'estimation était trop optimiste
+        total = len(_TOKEN_RE.findall(" ".join(build_group_lines(dict(spec, token_budget=None), planned, styles_map))))
+        if total <= budget or tier_start >= len(order): break
+        limit -= total - budget
+    report = {"tokens": total, "budget": budget, "fits": total <= budget,
+              "condensed": [i for i, lv in enumerate(level) if lv == 1],
+              "dropped": [i for i, lv in enumerate(level) if lv == 2]}
+    return planned, report
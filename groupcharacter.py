@@ -2,10 +2,11 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 
 # Thème/constantes partagées
-from ui import WHITE, UI_FONT_BOLD, PADX_S, PADY_S, PADY_SEC, GRID_PAD
-
-def sorted_en(items): 
-    return sorted(items, key=lambda s: str(s).lower())
+from ui import WHITE, UI_FONT_BOLD, PADX_S, PADY_S, PADY_SEC, GRID_PAD, VirtualList
+from variations import MemberVariations, build_group_variations
+from engine import build_group_lines, member_label, plan_group_budget
+from promptcache import group_prompt
+from vocab import VOCAB
 
 class GroupForm:
     """
@@ -13,9 +14,10 @@ class GroupForm:
     (add_character/add_monster depuis les autres onglets),
     permet de réordonner, pondérer et générer un prompt de scène.
     """
-    def __init__(self, parent, styles_map, title_text="Group mixer", prompt_bus=None):
+    def __init__(self, parent, styles_map, title_text="Group mixer", prompt_bus=None, library=None):
         self.styles_map = styles_map
         self.prompt_bus = prompt_bus
+        self.library = library          # library.PromptLibrary : chaque prompt généré y est enregistré
         if not prompt_bus:
             raise ValueError("GroupForm requires a prompt_bus")
 
@@ -32,13 +34,19 @@ class GroupForm:
         self.allow_conflict = tk.BooleanVar(value=True)
         self.depth_var = tk.BooleanVar(value=True)
         self.motion_var = tk.BooleanVar(value=True)
+        self.factorize_var = tk.BooleanVar(value=False)
+        self.budget_var = tk.IntVar(value=0)        # tokens, 0 = pas de limite
+        self.variations_var = tk.IntVar(value=1)    # 1 = textes d'origine seulement
+        self.variations = MemberVariations(styles_map)
+        self._variation_seed = 0
 
         self._last_prompt = ""
 
         self._build_ui()
 
-        # subscribe to bus
-        self.prompt_bus.register(self._refresh_roster)
+        # subscribe to bus (événements de diff, pas la liste complète)
+        self._selected_id = None
+        self.prompt_bus.subscribe(self._apply_events)
 
     # ------- small builders -------
     _grid_rows = {}
@@ -64,29 +72,30 @@ class GroupForm:
         grid = self._make_grid(sec); grid.pack(fill="x")
 
         self._add_single_row(grid, "Render style", self.styles_map.keys(), self.style_var)
-        self._add_single_row(grid, "Action", [
-            "Idle pose","Marching","Negotiation / Parley","Celebration","Tracking / Scouting","Ambush set-up",
-            "Combat — melee","Combat — ranged","Duel","Boss battle","Casting ritual","Aftermath / wounded"
-        ], self.action_var)
-        self._add_single_row(grid, "Location", sorted_en([
-            "Plain Dark Background","City Alley","Collapsed Cathedral","Dungeon","Ancient Ruins","Forest Clearing",
-            "Foggy Graveyard","Shadowy Forest","Broken Throne Room","Torch-lit Dungeon","Snowy Pass","Desert Canyon",
-            "Moonlit Rooftop","Cliff Edge","Mountain Pass","Night Seashore","Marketplace","Temple","Workshop","Cave"
-        ]), self.location_var)
-        self._add_single_row(grid, "Theme / Tone", [
-            "Epic","Heroic","Grimdark","Tragic","Hopeful","Mysterious","Survival","Political Intrigue"
-        ], self.theme_var)
-        self._add_single_row(grid, "Camera", [
-            "Wide shot (24–35mm)","Medium group (35–50mm)","Telephoto compressed (85mm)","Low angle","Slight Dutch angle"
-        ], self.camera_var)
-        self._add_single_row(grid, "Lighting", [
-            "Volumetric rays","Moonlit","Torchlit","Overcast soft light","Harsh backlight","Flickering firelight","Lantern glow"
-        ], self.light_var)
+        group = VOCAB.single("group")           # data/group.json
+        self._add_single_row(grid, "Action", group["action"], self.action_var)
+        self._add_single_row(grid, "Location", group["location"], self.location_var)
+        self._add_single_row(grid, "Theme / Tone", group["theme"], self.theme_var)
+        self._add_single_row(grid, "Camera", group["camera"], self.camera_var)
+        self._add_single_row(grid, "Lighting", group["light"], self.light_var)
 
         toggles = tk.Frame(sec, bg=WHITE); toggles.pack(anchor="w", fill="x", pady=(2,0))
         ttk.Checkbutton(toggles, text="Allow monsters vs characters conflict", variable=self.allow_conflict).pack(side="left")
         ttk.Checkbutton(toggles, text="Depth cues (overlaps, foreground/background)", variable=self.depth_var).pack(side="left", padx=12)
         ttk.Checkbutton(toggles, text="Motion cues (cloth, hair, particles)", variable=self.motion_var).pack(side="left", padx=12)
+        ttk.Checkbutton(toggles, text="State shared details once", variable=self.factorize_var).pack(side="left", padx=12)
+
+        budget = tk.Frame(sec, bg=WHITE); budget.pack(anchor="w", fill="x", pady=(2,0))
+        ttk.Label(budget, text="Token budget (0 = none):").pack(side="left")
+        ttk.Spinbox(budget, from_=0, to=8000, increment=50, textvariable=self.budget_var, width=6,
+                    command=self._update_budget_report).pack(side="left", padx=(6,0))
+        self.plan_var = tk.StringVar(value="")
+        ttk.Label(budget, textvariable=self.plan_var).pack(side="left", padx=12)
+        self.budget_var.trace_add("write", lambda *_: self._update_budget_report())
+        # la scène, le style et la factorisation changent aussi le texte émis : même re-planification
+        for var in (self.style_var, self.action_var, self.location_var, self.theme_var, self.camera_var,
+                    self.light_var, self.allow_conflict, self.depth_var, self.motion_var, self.factorize_var):
+            var.trace_add("write", lambda *_: self._update_budget_report())
 
         # Roster (list + controls)
         roster = tk.LabelFrame(self.frame, text="Roster (order = composition priority)", bg=WHITE)
@@ -95,8 +104,9 @@ class GroupForm:
         left = tk.Frame(roster, bg=WHITE); left.pack(side="left", fill="both", expand=True)
         right = tk.Frame(roster, bg=WHITE); right.pack(side="right", fill="y", padx=6)
 
-        self.listbox = tk.Listbox(left, height=10, activestyle="dotbox")
-        self.listbox.pack(fill="both", expand=True, padx=6, pady=6)
+        # liste virtualisée : seules les lignes visibles sont dans Tk, même avec des milliers de membres
+        self.roster_view = VirtualList(left, self._row_text_at, height=10)
+        self.roster_view.pack(fill="both", expand=True, padx=6, pady=6)
 
         # weight control for selected
         weight_box = tk.Frame(left, bg=WHITE); weight_box.pack(fill="x", padx=6, pady=(0,6))
@@ -104,7 +114,11 @@ class GroupForm:
         self.weight_var = tk.IntVar(value=3)
         ttk.Spinbox(weight_box, from_=1, to=9, textvariable=self.weight_var, width=4,
                     command=self._apply_weight).pack(side="left", padx=(6,0))
-        ttk.Button(weight_box, text="Apply", command=self._apply_weight).pack(side="left", padx=6)
+        ttk.Label(weight_box, text="Count:").pack(side="left", padx=(12,0))
+        self.count_var = tk.IntVar(value=1)
+        ttk.Spinbox(weight_box, from_=1, to=999, textvariable=self.count_var, width=5,
+                    command=self._apply_count).pack(side="left", padx=(6,0))
+        ttk.Button(weight_box, text="Apply", command=lambda: (self._apply_weight(), self._apply_count())).pack(side="left", padx=6)
 
         # buttons
         ttk.Button(right, text="▲ Up", command=lambda: self._move(-1)).pack(fill="x", pady=2)
@@ -118,86 +132,153 @@ class GroupForm:
         ttk.Button(btns, text="📋 Copy", command=self.open_copy).pack(side="left", padx=6)
         ttk.Button(btns, text="💾 Export .txt", command=self.export_txt).pack(side="left", padx=6)
 
+        # variantes par membre (pose, regard, expression, cadrage) depuis le spec stocké sur l'item
+        vary = tk.Frame(self.frame, bg=WHITE); vary.pack(pady=(0,4))
+        ttk.Label(vary, text="Variations per member").pack(side="left")
+        ttk.Spinbox(vary, from_=1, to=8, textvariable=self.variations_var, width=4).pack(side="left", padx=(6,12))
+        ttk.Button(vary, text="🎲 New variations", command=self.reroll_variations).pack(side="left", padx=6)
+
+        self.size_var = tk.StringVar(value="")
+        ttk.Label(self.frame, textvariable=self.size_var).pack(anchor="w", padx=6)
         self.output = tk.Text(self.frame, height=10, wrap="word", bg=WHITE)
         self.output.pack(fill="both", expand=True, padx=6, pady=(2,8))
 
         # update weight field on selection
-        self.listbox.bind("<<ListboxSelect>>", lambda e: self._sync_weight_from_selection())
+        self.roster_view.bind("<<VirtualListSelect>>", lambda e: self._on_roster_select())
 
     # ------- roster ops -------
-    def _refresh_roster(self, items):
-        self.listbox.delete(0, "end")
-        for i, it in enumerate(items):
-            tag = "CHAR" if it["type"] == "character" else "MONS"
-            self.listbox.insert("end", f"{i+1:02d} | {tag} | w{it['weight']} | {it['label']}")
+    def _row_text_at(self, i):
+        it = self.prompt_bus.items[i]
+        tag = "CHAR" if it["type"] == "character" else "MONS"
+        return f"{i+1:02d} | {tag} | w{it['weight']} | {member_label(it)}"
+
+    def _apply_events(self, events):
+        """
+        Événements du PromptBus -> vue virtualisée. La sélection suit le membre (id stable) ;
+        les lignes visibles ne sont redessinées que si un changement les touche.
+        """
+        view = self.roster_view
+        redraw = False
+        for ev in events:
+            if ev[0] == "reset" or view.visible(min(ev[1], ev[2]) if ev[0] == "moved" else ev[1]):
+                redraw = True; break
+        if self._selected_id is not None:
+            view.selected = self.prompt_bus.index_of(self._selected_id)
+            if view.selected is None: self._selected_id = None
+        view.set_count(len(self.prompt_bus), redraw=redraw)
+        self._update_budget_report()
+
+    def _on_roster_select(self):
+        idx = self.roster_view.selected
+        self._selected_id = self.prompt_bus.items[idx]["id"] if idx is not None else None
+        self._sync_weight_from_selection()
 
     def _current_index(self):
-        sel = self.listbox.curselection()
-        return int(sel[0]) if sel else None
+        return self.roster_view.selected
 
     def _sync_weight_from_selection(self):
         idx = self._current_index()
         if idx is None: return
         self.weight_var.set(self.prompt_bus.items[idx]["weight"])
+        self.count_var.set(self.prompt_bus.items[idx]["count"])
 
     def _apply_weight(self):
         idx = self._current_index()
         if idx is None: return
-        self.prompt_bus.set_weight(idx, self.weight_var.get())
-        self._refresh_roster(self.prompt_bus.items)
+        if self.weight_var.get() != self.prompt_bus.items[idx]["weight"]:
+            self.prompt_bus.set_weight(idx, self.weight_var.get())
+
+    def _apply_count(self):
+        idx = self._current_index()
+        if idx is None: return
+        try:
+            n = int(self.count_var.get())
+        except (tk.TclError, ValueError):
+            return
+        if n != self.prompt_bus.items[idx]["count"]: self.prompt_bus.set_count(idx, n)
 
     def _move(self, delta):
         idx = self._current_index()
         if idx is None: return
         if delta < 0: self.prompt_bus.move_up(idx)
         else:         self.prompt_bus.move_down(idx)
-        self._refresh_roster(self.prompt_bus.items)
-        new_idx = max(0, min(len(self.prompt_bus.items)-1, idx+delta))
-        self.listbox.selection_clear(0, "end"); self.listbox.selection_set(new_idx); self.listbox.activate(new_idx)
+        self.roster_view.see(self.roster_view.selected)
         self._sync_weight_from_selection()
 
     def _remove(self):
         idx = self._current_index()
         if idx is None: return
         self.prompt_bus.remove(idx)
-        self._refresh_roster(self.prompt_bus.items)
 
     # ------- prompt build -------
-    def _build_group_lines(self):
-        intro = self.styles_map.get(self.style_var.get(), next(iter(self.styles_map.values())))
-        lines = [intro]
+    def get_spec(self):
+        """Réglages de scène -> spec pour engine.build_group_lines."""
+        return {
+            "style": self.style_var.get(), "action": self.action_var.get(), "location": self.location_var.get(),
+            "theme": self.theme_var.get(), "camera": self.camera_var.get(), "light": self.light_var.get(),
+            "allow_conflict": self.allow_conflict.get(), "depth": self.depth_var.get(), "motion": self.motion_var.get(),
+            "factorize": self.factorize_var.get(), "token_budget": self._budget(),
+        }
+
+    def _budget(self):
+        try:
+            return max(0, int(self.budget_var.get())) or None
+        except (tk.TclError, ValueError):
+            return None
+
+    def _update_budget_report(self):
+        """
+        Re-planifie à chaque changement du roster (poids compris), de la scène ou de la factorisation :
+        quelques ms même à 1000 membres. L'estimation porte sur le texte émis (factorisé si coché).
+        """
+        budget = self._budget()
+        if not budget or not len(self.prompt_bus):
+            self.plan_var.set(""); return
+        rep = plan_group_budget(self.get_spec(), self.prompt_bus.items, self.styles_map, budget)[1]
+        msg = f"~{rep['tokens']:,} / {budget:,} tokens"
+        if rep["condensed"]: msg += f" | condensed: {len(rep['condensed'])}"
+        if rep["dropped"]:   msg += f" | details dropped: {len(rep['dropped'])}"
+        if not rep["fits"]:  msg += " | over budget (scene + roster alone)"
+        self.plan_var.set(msg)
 
-        lines.append(f"Group scene: {self.action_var.get()} at {self.location_var.get()}, theme {self.theme_var.get().lower()}.")
-        lines.append(f"Camera: {self.camera_var.get()}. Lighting: {self.light_var.get()}.")
-
-        if self.depth_var.get():  lines.append("Use strong depth cues: foreground/midground/background layers and tasteful overlaps.")
-        if self.motion_var.get(): lines.append("Add subtle motion: cloth/hair in motion, drifting dust or embers.")
-
-        if self.allow_conflict.get():
-            lines.append("If monsters and characters are present, allow direct conflict and clear opposing body language.")
-
-        # Individuals
-        if not self.prompt_bus.items:
-            lines.append("No individuals selected.")
-            return lines
-
-        lines.append("Individuals (in composition order; higher weight = more visual priority):")
-        for i, it in enumerate(self.prompt_bus.items, 1):
-            role = "Character" if it["type"] == "character" else "Monster"
-            lines.append(f"{i:02d}. [{role}] weight {it['weight']} — {it['label']}.")
-        # Append their prompts (full text) after a separator
-        lines.append("—— Individual detailed prompts ——")
-        for i, it in enumerate(self.prompt_bus.items, 1):
-            lines.append(f"[{it['label']}] {it['text']}")
-
-        return lines
+    def _build_group_lines(self):
+        return build_group_lines(self.get_spec(), self.prompt_bus.items, self.styles_map)
 
     def generate_prompt(self):
-        text = " ".join(self._build_group_lines())
+        try:
+            k = max(1, int(self.variations_var.get()))
+        except (tk.TclError, ValueError):
+            k = 1
+        spec = self.get_spec()
+        if k == 1:
+            text = group_prompt(spec, self.prompt_bus.items, self.styles_map)
+        else:
+            versions = build_group_variations(spec, self.prompt_bus.items, self.styles_map,
+                                              k, self._variation_seed, self.variations)
+            text = "\n\n".join(f"=== Variation {j+1}/{k} ===\n" + " ".join(lines) for j, lines in enumerate(versions))
         self._last_prompt = text
+        if self.library is not None:
+            roster = [{k: it[k] for k in ("type", "label", "weight", "count")} for it in self.prompt_bus.items]
+            self.library.add("group", f"{self.action_var.get()} — {len(roster)} member(s)", text,
+                             dict(spec, items=roster))
+        self._report_size(spec, text if k == 1 else None)
         self.output.delete("1.0", "end")
         self.output.insert("1.0", text)
 
+    def reroll_variations(self):
+        """Nouveau tirage pour les variantes 2..k (la variante 1 reste le texte d'origine)."""
+        self._variation_seed += 1
+        self.generate_prompt()
+
+    def _report_size(self, spec, text=None):
+        """Gain de la factorisation : le prompt factorisé est celui qui vient d'être généré, le plein passe par le cache."""
+        if not spec["factorize"] or len(self.prompt_bus) < 2:
+            self.size_var.set(""); return
+        items = self.prompt_bus.items
+        factored = len(text if text is not None else group_prompt(spec, items, self.styles_map))
+        full = len(group_prompt(dict(spec, factorize=False), items, self.styles_map))
+        self.size_var.set(f"Shared details factored: {full:,} → {factored:,} chars (−{100 * (full - factored) / full:.0f}%)")
+
     def open_copy(self):
         txt = self.output.get("1.0","end-1c").strip()
         if not txt:
@@ -0,0 +1,73 @@
+# horde.py
+"""
+Hordes de monstres : N variantes d'un spec de base, diversité contrôlée, sans Tk.
+
+    specs = horde_specs(form.get_spec(), 200, seed=1, diversity=0.6)
+    push_horde(bus, specs, styles_map)      # un seul événement PromptBus
+
+Chaque champ varié reçoit une colonne stratifiée : les options sont réparties à parts égales
+puis mélangées (tirage sans remise par tranches), donc pas de valeur surreprésentée.
+Une variante prend la valeur de sa colonne avec la probabilité `diversity`, sinon garde la base.
+Taille : au plus un cran autour de la taille de base. Anatomie : base + un trait en plus.
+Les doublons exacts sont retirés tant que l'espace le permet.
+"""
+import random
+
+from engine import STYLES, _single, _multi
+from promptcache import monster_prompt
+from vocab import VOCAB
+
+VARIED = ("Size class", "Temperament", "Anatomy", "Dominant color", "Secondary color", "Pose")
+_CHOICES = {key: VOCAB.options("monster", key) for key in VARIED}
+SIZE_CLASS, ANATOMY = _CHOICES["Size class"], _CHOICES["Anatomy"]
+
+
+def _choices(base, key):
+    if key == "Size class":
+        size = _single(base, key)
+        if size in SIZE_CLASS:
+            i = SIZE_CLASS.index(size)
+            return SIZE_CLASS[max(0, i - 1):i + 2]
+    if key == "Anatomy":
+        have = set(_multi(base, key) or [])
+        return [a for a in ANATOMY if a not in have]
+    return _CHOICES[key]
+
+def _column(rng, options, n):
+    """n valeurs, chaque option apparaît floor(n/k) ou ceil(n/k) fois, ordre aléatoire."""
+    col = []
+    while len(col) < n:
+        chunk = list(options); rng.shuffle(chunk); col.extend(chunk)
+    return col[:n]
+
+def horde_specs(base, n, seed=None, diversity=0.6, fields=VARIED, max_tries=20):
+    """base (spec monster) -> n specs variantes."""
+    rng = random.Random(seed)
+    fields = [k for k in fields if _choices(base, k)]
+    columns = {k: _column(rng, _choices(base, k), n) for k in fields}
+    anatomy = list(_multi(base, "Anatomy") or [])
+    seen, out = set(), []
+    for i in range(n):
+        for attempt in range(max_tries):
+            spec = dict(base)
+            for k in fields:
+                if rng.random() >= diversity: continue
+                v = columns[k][i] if not attempt else rng.choice(_choices(base, k))
+                spec[k] = anatomy + [v] if k == "Anatomy" else v
+            key = tuple(tuple(spec.get(k) or ()) if k == "Anatomy" else spec.get(k) for k in fields)
+            if key not in seen: break
+        seen.add(key)
+        out.append(spec)
+    return out
+
+def horde_label(spec):
+    """Espèce + ce qui distingue la variante dans le roster, ex. "Goblin, Large Cunning"."""
+    species = _single(spec, "Species") or "Monster"
+    traits = " ".join(v for v in (_single(spec, "Size class"), _single(spec, "Temperament")) if v)
+    return f"{species}, {traits}" if traits else species
+
+def push_horde(bus, specs, styles_map=STYLES, weight=3):
+    """Rend et ajoute les variantes au PromptBus en une transaction. Renvoie les ids (copies regroupées)."""
+    with bus.batch():
+        return [bus.add_monster(horde_label(s), monster_prompt(s, styles_map), weight=weight, spec=s)
+                for s in specs]
@@ -0,0 +1,135 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+# Thème/constantes partagées
+from ui import WHITE, PADX_S, PADY_S, PADY_SEC, VirtualList
+
+PAGE = 100            # lignes lues par requête (pagination keyset, library.search(before=...))
+KINDS = ("All", "character", "monster", "group")
+
+
+class LibraryForm:
+    """
+    Onglet Library : recherche dans tous les prompts générés (library.PromptLibrary).
+    Les résultats arrivent par pages ; la page suivante est lue quand la liste atteint la fin.
+    """
+    def __init__(self, parent, styles_map, library, title_text="Prompt library", prompt_bus=None):
+        self.styles_map = styles_map
+        self.library = library
+        self.prompt_bus = prompt_bus
+
+        self.frame = tk.LabelFrame(parent, text=title_text, bg=WHITE)
+        self.frame.configure(padx=PADX_S, pady=PADY_S)
+
+        self.search_var = tk.StringVar(value="")
+        self.kind_var = tk.StringVar(value="All")
+        self.status_var = tk.StringVar(value="")
+        self.rows = []               # résumés chargés (sans prompt), plus récents d'abord
+        self._more = False           # une page de plus est disponible
+        self._queued = False         # lecture de la page suivante déjà demandée
+        self._pending = None         # after() de la recherche différée
+        self._current = None         # entrée complète affichée
+
+        self._build_ui()
+        self.refresh()
+
+    # ------- UI -------
+    def _build_ui(self):
+        bar = tk.Frame(self.frame, bg=WHITE); bar.pack(fill="x", pady=PADY_SEC)
+        ttk.Label(bar, text="Search:", style="Bold.TLabel").pack(side="left")
+        entry = ttk.Entry(bar, textvariable=self.search_var, width=48)
+        entry.pack(side="left", padx=(6,12))
+        entry.bind("<Return>", lambda e: self.refresh())
+        ttk.Label(bar, text="Kind:").pack(side="left")
+        ttk.Combobox(bar, textvariable=self.kind_var, values=KINDS, state="readonly",
+                     width=10, style="Compact.TCombobox").pack(side="left", padx=(6,12))
+        ttk.Button(bar, text="↻ Refresh", command=self.refresh).pack(side="left")
+        ttk.Label(bar, textvariable=self.status_var).pack(side="left", padx=12)
+        # recherche à la frappe, différée pour ne pas interroger SQLite à chaque touche
+        self.search_var.trace_add("write", lambda *_: self._schedule())
+        self.kind_var.trace_add("write", lambda *_: self.refresh())
+
+        self.results = VirtualList(self.frame, self._row_text_at, height=14)
+        self.results.pack(fill="both", expand=True, padx=6, pady=6)
+        self.results.bind("<<VirtualListSelect>>", lambda e: self._show_selected())
+
+        btns = tk.Frame(self.frame, bg=WHITE); btns.pack(pady=(4,4))
+        ttk.Button(btns, text="📋 Copy", command=self.copy_selected).pack(side="left", padx=6)
+        ttk.Button(btns, text="➕ Add to Group", command=self.add_to_group).pack(side="left", padx=6)
+        ttk.Button(btns, text="Delete", command=self.delete_selected).pack(side="left", padx=6)
+
+        self.output = tk.Text(self.frame, height=10, wrap="word", bg=WHITE)
+        self.output.pack(fill="both", expand=True, padx=6, pady=(2,8))
+
+    # ------- pages -------
+    def _filters(self):
+        kind = self.kind_var.get()
+        return {"kind": kind} if kind in KINDS[1:] else {}
+
+    def _schedule(self, delay=150):
+        if self._pending: self.frame.after_cancel(self._pending)
+        self._pending = self.frame.after(delay, self.refresh)
+
+    def refresh(self):
+        """Relance la recherche depuis la première page."""
+        self._pending = None
+        self.rows = []
+        self._more = True
+        self.results.selected = None
+        self.results.top = 0
+        self._load_page()
+
+    def _load_page(self):
+        self._queued = False
+        if not self._more: return
+        before = self.rows[-1]["id"] if self.rows else None
+        page = self.library.search(self.search_var.get().strip(), limit=PAGE, before=before, **self._filters())
+        self._more = len(page) == PAGE
+        self.rows.extend(page)
+        self.status_var.set(f"{len(self.rows):,} result(s)" + (" — scroll for more" if self._more else ""))
+        self.results.set_count(len(self.rows))
+
+    def _row_text_at(self, i):
+        if self._more and not self._queued and i >= len(self.rows) - 1:
+            self._queued = True
+            self.frame.after_idle(self._load_page)      # fin de liste atteinte : page suivante
+        r = self.rows[i]
+        detail = r["species"] if r["kind"] == "monster" else r["place"]
+        return f"{r['id']:>7} | {r['kind'][:4].upper()} | {r['label']}" + (f" — {detail}" if detail else "")
+
+    # ------- actions -------
+    def _show_selected(self):
+        idx = self.results.selected
+        self._current = self.library.get(self.rows[idx]["id"]) if idx is not None else None
+        self.output.delete("1.0", "end")
+        if self._current:
+            self.output.insert("1.0", self._current["prompt"])
+
+    def copy_selected(self):
+        if not self._current:
+            messagebox.showwarning("No prompt", "Select a prompt first.")
+            return
+        self.frame.clipboard_clear()
+        self.frame.clipboard_append(self._current["prompt"])
+        messagebox.showinfo("Copied", "Prompt copied to clipboard.")
+
+    def add_to_group(self):
+        cur = self._current
+        if not cur or cur["kind"] == "group" or self.prompt_bus is None:
+            messagebox.showwarning("Add to Group", "Select a character or monster prompt first.")
+            return
+        add = self.prompt_bus.add_monster if cur["kind"] == "monster" else self.prompt_bus.add_character
+        try:
+            add(cur["label"], cur["prompt"], weight=3, spec=cur["spec"])
+        except RuntimeError as e:
+            messagebox.showerror("Roster full", str(e)); return
+        messagebox.showinfo("Added", f"Added to Group:\n{cur['label']}")
+
+    def delete_selected(self):
+        idx = self.results.selected
+        if idx is None: return
+        if not messagebox.askyesno("Delete", f"Delete '{self.rows[idx]['label']}' from the library?"): return
+        self.library.delete(self.rows.pop(idx)["id"])
+        self._current = None
+        self.output.delete("1.0", "end")
+        self.results.set_count(len(self.rows))
@@ -1,75 +1,29 @@
 # main.py
 import tkinter as tk
 from tkinter import ttk, messagebox
+import sqlite3
+import sys
+import time
 import traceback
 
 from solocharacter import CharacterForm
 from groupcharacter import GroupForm
 from monsters import MonsterForm
+from engine import STYLES
+from promptcache import CACHE
+from library import PromptLibrary, default_path
+from promptbus import PromptBus
 
 # UI partagé
 from ui import apply_theme, ScrollFrame, WHITE
 
-# ---------- Shared Prompt Bus ----------
-class PromptBus:
-    """
-    In-memory roster for group mixing (characters + monsters).
-    Each item: {"type": "character"|"monster", "label": str, "text": str, "weight": int}
-    """
-    MAX_ITEMS = 12
-
-    def __init__(self):
-        self.items = []
-        self.listeners = []
-
-    def register(self, callback):
-        self.listeners.append(callback)
-        callback(list(self.items))
-
-    def _notify(self):
-        for cb in self.listeners:
-            cb(list(self.items))
-
-    def add(self, item):
-        if len(self.items) >= self.MAX_ITEMS:
-            raise RuntimeError(f"Roster is full (max {self.MAX_ITEMS}).")
-        self.items.append(item)
-        self._notify()
-
-    def add_character(self, label, text, weight=3):
-        self.add({"type": "character", "label": label or "Character", "text": text, "weight": int(weight)})
-
-    def add_monster(self, label, text, weight=3):
-        self.add({"type": "monster", "label": label or "Monster", "text": text, "weight": int(weight)})
-
-    def move_up(self, idx):
-        if 0 < idx < len(self.items):
-            self.items[idx-1], self.items[idx] = self.items[idx], self.items[idx-1]
-            self._notify()
-
-    def move_down(self, idx):
-        if 0 <= idx < len(self.items) - 1:
-            self.items[idx+1], self.items[idx] = self.items[idx], self.items[idx+1]
-            self._notify()
-
-    def remove(self, idx):
-        if 0 <= idx < len(self.items):
-            self.items.pop(idx)
-            self._notify()
-
-    def clear(self):
-        self.items.clear()
-        self._notify()
-
-    def set_weight(self, idx, w):
-        if 0 <= idx < len(self.items):
-            self.items[idx]["weight"] = int(w)
-            self._notify()
-
-
 # ---------- App ----------
 class App:
-    def __init__(self, root):
+    """
+    Fenêtre principale. Seul l'onglet Character est construit au démarrage ;
+    Group, Monsters et Library le sont à leur première sélection (lazy_tabs=False pour tout construire d'emblée).
+    """
+    def __init__(self, root, lazy_tabs=True):
         root.title("Simplified Character Generation")
         root.minsize(1000, 680)
 
@@ -77,50 +31,97 @@ class App:
         apply_theme(root)
 
         # 2) Styles d’image partagés
-        styles_map = {
-            "Dark Fantasy (B/W)": "A black-and-white, highly detailed portrait in dark fantasy or gothic style, charcoal or ink rendering.",
-            "Heroic Fantasy (color)": "A vibrant, full-color heroic fantasy character portrait, painted illustration.",
-            "Photorealistic": "A photorealistic portrait with shallow depth of field (85mm lens), high dynamic range.",
-            "Anime / Manga": "An anime-style character portrait with clean lineart and cel shading.",
-            "Soft Watercolor": "A soft watercolor illustration with light washes and paper texture.",
-            "Oil Painting": "An oil painting portrait with rich brush strokes and dramatic lighting.",
-            "Steampunk": "A steampunk character portrait with brass fittings, gears, and Victorian aesthetics.",
-            "Neon Cyberpunk": "A neon-lit cyberpunk portrait with moody atmosphere and futuristic city glow.",
-            "Etching": "A monochrome copperplate etching style with fine cross-hatching.",
-            "Cinematic Concept Art": "A cinematic concept art portrait, painterly and high detail."
-        }
+        self.styles_map = STYLES
 
         # Bus partagé pour l’onglet Groupe
         self.bus = PromptBus()
 
-        nb = ttk.Notebook(root)
-        nb.pack(fill="both", expand=True)
-
-        # Onglet Character
-        tab1 = ScrollFrame(nb)
-        nb.add(tab1, text="Character")
-        self.char_form = CharacterForm(tab1.interior, styles_map, prompt_bus=self.bus)
+        # Bibliothèque SQLite : tous les prompts générés (onglet Library) ; l'app tourne sans si elle ne s'ouvre pas
+        try:
+            self.library = PromptLibrary(default_path())
+        except (OSError, sqlite3.Error) as e:
+            print(f"Prompt library disabled: {e}", file=sys.stderr)
+            self.library = None
+
+        self.nb = ttk.Notebook(root)
+        self.nb.pack(fill="both", expand=True)
+        self._pending_tabs = {}   # nom Tk de l'onglet -> (ScrollFrame, builder)
+        self.char_form = self.group_form = self.monster_form = self.library_form = None
+
+        self._add_tab("Character", self._build_character_tab, lazy=False)
+        self._add_tab("Group", self._build_group_tab, lazy=lazy_tabs)        # mixer
+        self._add_tab("Monsters", self._build_monster_tab, lazy=lazy_tabs)
+        if self.library is not None:
+            self._library_tab = self._add_tab("Library", self._build_library_tab, lazy=lazy_tabs)
+        self.nb.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+
+    # ---------- onglets ----------
+    def _add_tab(self, text, builder, lazy):
+        tab = ScrollFrame(self.nb)
+        self.nb.add(tab, text=text)
+        if lazy: self._pending_tabs[str(tab)] = (tab, builder)
+        else:    builder(tab)
+        return tab
+
+    def _on_tab_changed(self, _event=None):
+        pending = self._pending_tabs.pop(self.nb.select(), None)
+        if pending:
+            tab, builder = pending
+            builder(tab)
+        elif self.library_form and self.nb.select() == str(self._library_tab):
+            self.library_form.refresh()      # prompts générés depuis la dernière visite
+
+    def build_all_tabs(self):
+        """Force la construction des onglets encore différés."""
+        for tab, builder in list(self._pending_tabs.values()):
+            builder(tab)
+        self._pending_tabs.clear()
+
+    def _build_character_tab(self, tab):
+        self.char_form = CharacterForm(tab.interior, self.styles_map, prompt_bus=self.bus, library=self.library)
         self.char_form.frame.pack(anchor="w", fill="x", padx=8, pady=8)
 
-        # Onglet Group (mixer)
-        tab2 = ScrollFrame(nb)
-        nb.add(tab2, text="Group")
-        self.group_form = GroupForm(tab2.interior, styles_map, prompt_bus=self.bus)
+    def _build_group_tab(self, tab):
+        # subscribe() envoie tout de suite un événement "reset" avec le roster courant : un onglet construit tard reste à jour
+        self.group_form = GroupForm(tab.interior, self.styles_map, prompt_bus=self.bus, library=self.library)
         self.group_form.frame.pack(anchor="w", fill="x", padx=8, pady=8)
 
-        # Onglet Monsters
-        tab3 = ScrollFrame(nb)
-        nb.add(tab3, text="Monsters")
-        self.monster_form = MonsterForm(tab3.interior, styles_map, prompt_bus=self.bus)
+    def _build_monster_tab(self, tab):
+        self.monster_form = MonsterForm(tab.interior, self.styles_map, prompt_bus=self.bus, library=self.library)
         self.monster_form.frame.pack(anchor="w", fill="x", padx=8, pady=8)
 
+    def _build_library_tab(self, tab):
+        from libraryview import LibraryForm
+        self.library_form = LibraryForm(tab.interior, self.styles_map, self.library, prompt_bus=self.bus)
+        self.library_form.frame.pack(anchor="w", fill="x", padx=8, pady=8)
+
+
+def measure_startup(lazy_tabs=True):
+    """Temps jusqu'au premier affichage (création Tk + App + premier rendu), en secondes."""
+    t0 = time.perf_counter()
+    root = tk.Tk()
+    app = App(root, lazy_tabs=lazy_tabs)
+    root.update()   # traite map/expose : la fenêtre est peinte
+    elapsed = time.perf_counter() - t0
+    root.destroy()
+    if app.library is not None: app.library.close()
+    return elapsed
+
 
 # ---------- Safe launch ----------
 if __name__ == "__main__":
+    if "--startup-time" in sys.argv:
+        # python main.py --startup-time : compare démarrage différé vs tout construire
+        for lazy in (False, True):
+            runs = [measure_startup(lazy) for _ in range(3)]
+            print(f"{'lazy tabs' if lazy else 'eager tabs'}: first paint {min(runs) * 1000:.0f} ms (best of 3)")
+        sys.exit(0)
     try:
         root = tk.Tk()
-        App(root)
+        app = App(root)
         root.mainloop()
+        CACHE.save()      # seulement si PROMPT_CACHE=chemin
+        if app.library is not None: app.library.close()
     except Exception:
         err = traceback.format_exc()
         print(err)
@@ -1,70 +1,22 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import unicodedata
-
-from ui import WHITE, PADX_S, PADY_S, PADY_SEC, GRID_PAD
-
-# --- utils ---
-def unaccent(s: str) -> str:
-    return "".join(ch for ch in unicodedata.normalize("NFD", s) if not unicodedata.combining(ch))
-def sorted_en(items): return sorted(items, key=lambda s: unaccent(s).lower())
-def parse_custom_list(text: str):
-    if not text: return []
-    out = []
-    for token in text.replace(";", ",").replace("\n", ",").split(","):
-        t = token.strip()
-        if t: out.append(t)
-    return out
-
-# --- vocab ---
-SPECIES = sorted_en([
-    "Undead","Vampire","Zombie","Skeleton","Wraith","Ghost",
-    "Demon","Devil","Imp","Gargoyle",
-    "Dragon","Wyvern","Basilisk","Hydra",
-    "Giant","Troll","Ogre",
-    "Goblin","Orc","Kobold","Lizardfolk",
-    "Werewolf","Lycanthrope",
-    "Giant Spider","Giant Scorpion","Kraken","Leviathan",
-    "Slime","Ooze",
-    "Golem (Stone)","Golem (Iron)","Golem (Clay)","Golem (Flesh)",
-    "Elemental (Fire)","Elemental (Ice)","Elemental (Air)","Elemental (Earth)",
-    "Plant Monster","Treant","Vine Horror"
-])
-SIZE_CLASS = ["Tiny","Small","Medium","Large","Huge","Colossal"]
-TEMPER = ["Ferocious","Territorial","Cunning","Mindless","Predatory","Brooding","Malevolent","Savage","Stalking"]
-
-ANATOMY = sorted_en([
-    "Claws","Talons","Fangs","Tusks","Horns","Antlers","Spikes","Bony Plates","Scales","Chitin","Fur","Feathers",
-    "Exposed Bone","Tentacles","Wings","Multiple Eyes","Single Eye","Extra Arms","Tail","Stinger",
-    "Venom","Acidic Saliva","Fire Breath","Ice Breath","Poison Cloud"
-])
-LOCOMOTION = ["Biped","Quadruped","Serpentine","Aerial","Burrowing","Aquatic","Amphibious","Ooze-like"]
-BEHAVIOR = sorted_en([
-    "Ambush Hunter","Pack Tactics","Solitary Stalker","Territorial Roar","Fear Aura",
-    "Regeneration","Camouflage","Invisibility","Shadow Step","Teleport",
-    "Magic Resistant","Necrotic Aura","Psychic Scream","Web Spinning","Stone Gaze","Charm Gaze"
-])
-BIOOME = sorted_en([
-    "Cave","Ancient Ruins","Swamp","Mire","Shadowy Forest","Mountain Pass","Desert Dunes","Snowy Tundra","City Sewer",
-    "Cathedral Ruin","Cemetery","Volcanic Crater","Abandoned Mine","Stormy Coast","Ship Graveyard"
-])
-COLORS = sorted_en([
-    "Black","Charcoal","Grey","White","Bone","Green","Olive","Dark Green","Brown","Umber","Rust","Crimson",
-    "Purple","Violet","Blue","Teal","Copper","Bronze","Gold","Silver"
-])
-LIGHTING = ["Moonlit","Torchlit","Volumetric Rays","Overcast","Backlit silhouette","Lightning flashes"]
-FRAMING = sorted_en([
-    "Head Only","Bust","Torso","Half Body","Three-Quarter View","Full Body","Low Angle","High Angle","Wide Shot"
-])
-POSES = sorted_en([
-    "Roaring","Lunging","Stalking","Coiled to strike","Spreading wings","Perched and glaring","Emerging from shadows",
-    "Breaking through wall","Bursting from water","Crushing debris underfoot"
-])
+
+from ui import WHITE, PADX_S, PADY_S, PADY_SEC, GRID_PAD, MultiSelection, LivePreview, TypeAhead, JumpBox
+from engine import MONSTER_SINGLE_KEYS, MONSTER_MULTI_KEYS, MONSTER_SECTIONS, SectionRenderer, build_monster_lines, monster_label, member_label
+from promptcache import monster_prompt
+from vocab import VOCAB, parse_custom_list
+from optionindex import shared_index
+
+# Options par champ (mêmes clés que single_vars / multi_blocks), tirées de data/monster.json
+SINGLE_OPTIONS = VOCAB.single("monster")
+MULTI_OPTIONS = VOCAB.multi("monster")
+FILTER_MIN = 12         # blocs de cases à partir de cette taille : champ "Filter"
 
 class MonsterForm:
-    def __init__(self, parent, styles_map, title_text="Monster generator", prompt_bus=None):
+    def __init__(self, parent, styles_map, title_text="Monster generator", prompt_bus=None, library=None):
         self.styles_map = styles_map
         self.prompt_bus = prompt_bus
+        self.library = library          # library.PromptLibrary : chaque prompt généré y est enregistré
 
         self.frame = tk.LabelFrame(parent, text=title_text, bg=WHITE)
         self.frame.configure(padx=PADX_S, pady=PADY_S)
@@ -75,9 +27,19 @@ class MonsterForm:
         self.single_vars = {}
         self.multi_blocks = {}
         self.energy_var = tk.BooleanVar(value=True)
-        self._last_prompt = ""
+        self.horde_n_var = tk.IntVar(value=6)
+        self.horde_div_var = tk.DoubleVar(value=0.6)
+        self._last_prompt, self._last_spec = "", None
+
+        # aperçu live : chaque champ notifie sa clé, seules les sections touchées sont recalculées
+        self._renderer = SectionRenderer(MONSTER_SECTIONS, styles_map)
+        self.live = LivePreview(self.frame, None, self.read_field,
+                                lambda spec: " ".join(self._renderer.render(spec)), on_text=self._set_last_prompt)
 
         self._build_ui()
+        self.live.output = self.output
+        for key, var in (("style", self.style_var), ("energy", self.energy_var)):
+            self._watch(key, var)
 
     # ---- grid helpers ----
     _grid_rows = {}
@@ -90,36 +52,53 @@ class MonsterForm:
         self._grid_rows[f] = 0
         return f
 
+    def _watch(self, key, *variables):
+        """Relie des variables Tk à l'aperçu live (clé du champ -> section sale)."""
+        self.live.track(key)
+        for v in variables:
+            v.trace_add("write", lambda *_a: self.live.touch(key))
+
     def _add_single_row(self, grid_parent, label, options, key, width=20):
         r = self._grid_rows[grid_parent]
         ttk.Label(grid_parent, text=label, style="Bold.TLabel").grid(row=r, column=0, sticky="w", padx=(0,8), pady=(PADY_S, PADY_S))
         var = tk.StringVar(value="— (leave empty) —")
-        ttk.Combobox(grid_parent, textvariable=var, values=["— (leave empty) —"]+list(options),
-                     state="readonly", width=width, style="Compact.TCombobox").grid(row=r, column=1, sticky="w", pady=(PADY_S, PADY_S))
+        values = ["— (leave empty) —"]+list(options)
+        combo = ttk.Combobox(grid_parent, textvariable=var, values=values,
+                             state="readonly", width=width, style="Compact.TCombobox")
+        combo.grid(row=r, column=1, sticky="w", pady=(PADY_S, PADY_S))
+        TypeAhead(combo, values, lambda text, k=key: self._find(text, k))
         other = tk.StringVar()
         ttk.Entry(grid_parent, textvariable=other).grid(row=r, column=2, sticky="ew", padx=(8,0), pady=(PADY_S, PADY_S))
         ttk.Label(grid_parent, text="Other").grid(row=r, column=3, sticky="w", padx=(6,0), pady=(PADY_S, PADY_S))
         self.single_vars[key] = (var, other)
+        self._watch(key, var, other)
         self._grid_rows[grid_parent] = r + 1
 
     def _add_multi_block(self, parent, title, options, key, columns=2, grid=False, grid_rc=(0,0)):
         block = tk.LabelFrame(parent, text=title, bg=WHITE)
-        items = []
+        selection = MultiSelection(options)
         rows = max(1, (len(options) + columns - 1)//columns)
-        for idx, opt in enumerate(options):
-            v = tk.BooleanVar()
-            cb = ttk.Checkbutton(block, text=opt, variable=v)
+        for idx in range(len(options)):
+            cb = selection.add_checkbutton(block, idx)
             r, c = idx % rows, idx // rows
             block.grid_columnconfigure(c, weight=1, uniform=f"{key}_cols")
             cb.grid(row=r, column=c, sticky="w", padx=(4,4), pady=(GRID_PAD, GRID_PAD))
-            items.append((opt, v))
         bottom = tk.Frame(block, bg=WHITE)
         bottom.grid(row=rows, column=0, columnspan=columns, sticky="ew")
         other_var = tk.StringVar()
         ttk.Entry(bottom, textvariable=other_var).grid(row=0, column=0, sticky="ew", padx=(4,4), pady=(4,2))
         ttk.Label(bottom, text="Other (comma separated)").grid(row=0, column=1, sticky="w", padx=(6,0))
         bottom.grid_columnconfigure(0, weight=1)
-        self.multi_blocks[key] = {"frame": block, "items": items, "other_var": other_var}
+        self.multi_blocks[key] = {"frame": block, "selection": selection, "other_var": other_var, "columns": columns}
+        if len(options) >= FILTER_MIN:
+            # filtre à la frappe : seules les cases trouvées par l'index restent affichées
+            filter_var = tk.StringVar()
+            ttk.Label(bottom, text="Filter").grid(row=0, column=2, sticky="w", padx=(12,0))
+            ttk.Entry(bottom, textvariable=filter_var, width=10).grid(row=0, column=3, sticky="w", padx=(6,4))
+            filter_var.trace_add("write", lambda *_a: self._filter_block(key))
+            self.multi_blocks[key]["filter_var"] = filter_var
+        selection.on_change(lambda: self.live.touch(key))
+        self._watch(key, other_var)
         if grid:
             r, c = grid_rc; block.grid(row=r, column=c, sticky="nsew", padx=4, pady=PADY_SEC)
         else:
@@ -132,38 +111,47 @@ class MonsterForm:
         ttk.Label(header, text="Render style", style="Bold.TLabel").pack(side="left")
         ttk.Combobox(header, textvariable=self.style_var, values=list(self.styles_map.keys()),
                      state="readonly", width=30, style="Compact.TCombobox").pack(side="left", padx=(8,0))
+        JumpBox(header, self._jump_search, self.pick_option).pack(side="left", anchor="n", padx=(24,0))
 
         sec_id = tk.LabelFrame(self.frame, text="Identity", bg=WHITE); sec_id.pack(fill="x", pady=PADY_SEC)
         grid_id = self._make_grid(sec_id); grid_id.pack(fill="x")
-        self._add_single_row(grid_id, "Species", SPECIES, "Species", width=24)
-        self._add_single_row(grid_id, "Size class", SIZE_CLASS, "Size class", width=18)
-        self._add_single_row(grid_id, "Temperament", TEMPER, "Temperament", width=20)
+        self._add_single_row(grid_id, "Species", SINGLE_OPTIONS["Species"], "Species", width=24)
+        self._add_single_row(grid_id, "Size class", SINGLE_OPTIONS["Size class"], "Size class", width=18)
+        self._add_single_row(grid_id, "Temperament", SINGLE_OPTIONS["Temperament"], "Temperament", width=20)
 
         sec_an = tk.LabelFrame(self.frame, text="Anatomy & Abilities", bg=WHITE); sec_an.pack(fill="x", pady=PADY_SEC)
         row_an = tk.Frame(sec_an, bg=WHITE); row_an.pack(fill="x")
         for i in range(3): row_an.grid_columnconfigure(i, weight=1, uniform="anrow")
-        self._add_multi_block(row_an, "Anatomy", ANATOMY, "Anatomy", columns=2, grid=True, grid_rc=(0,0))
-        self._add_multi_block(row_an, "Locomotion", LOCOMOTION, "Locomotion", columns=1, grid=True, grid_rc=(0,1))
-        self._add_multi_block(row_an, "Behaviors / Powers", BEHAVIOR, "Behaviors", columns=2, grid=True, grid_rc=(0,2))
+        self._add_multi_block(row_an, "Anatomy", MULTI_OPTIONS["Anatomy"], "Anatomy", columns=2, grid=True, grid_rc=(0,0))
+        self._add_multi_block(row_an, "Locomotion", MULTI_OPTIONS["Locomotion"], "Locomotion", columns=1, grid=True, grid_rc=(0,1))
+        self._add_multi_block(row_an, "Behaviors / Powers", MULTI_OPTIONS["Behaviors"], "Behaviors", columns=2, grid=True, grid_rc=(0,2))
 
         sec_color = tk.LabelFrame(self.frame, text="Colors & Look (optional)", bg=WHITE); sec_color.pack(fill="x", pady=PADY_SEC)
         grid_col = self._make_grid(sec_color); grid_col.pack(fill="x")
-        self._add_single_row(grid_col, "Dominant color", COLORS, "Dominant color", width=18)
-        self._add_single_row(grid_col, "Secondary color", COLORS, "Secondary color", width=18)
+        self._add_single_row(grid_col, "Dominant color", SINGLE_OPTIONS["Dominant color"], "Dominant color", width=18)
+        self._add_single_row(grid_col, "Secondary color", SINGLE_OPTIONS["Secondary color"], "Secondary color", width=18)
 
         sec_scene = tk.LabelFrame(self.frame, text="Scene & Framing", bg=WHITE); sec_scene.pack(fill="x", pady=PADY_SEC)
         grid_sc = self._make_grid(sec_scene); grid_sc.pack(fill="x")
-        self._add_single_row(grid_sc, "Biome / Background", BIOOME, "Background", width=26)
-        self._add_single_row(grid_sc, "Lighting", LIGHTING, "Lighting", width=20)
-        self._add_single_row(grid_sc, "Pose / Action", POSES, "Pose", width=22)
-        self._add_single_row(grid_sc, "Framing", FRAMING, "Framing", width=22)
+        self._add_single_row(grid_sc, "Biome / Background", SINGLE_OPTIONS["Background"], "Background", width=26)
+        self._add_single_row(grid_sc, "Lighting", SINGLE_OPTIONS["Lighting"], "Lighting", width=20)
+        self._add_single_row(grid_sc, "Pose / Action", SINGLE_OPTIONS["Pose"], "Pose", width=22)
+        self._add_single_row(grid_sc, "Framing", SINGLE_OPTIONS["Framing"], "Framing", width=22)
         ttk.Checkbutton(sec_scene, text="Inject motion (debris, dust, water spray, cloth)", variable=self.energy_var).pack(anchor="w", padx=6, pady=(2,0))
 
         btns = tk.Frame(self.frame, bg=WHITE); btns.pack(pady=(6,4))
         ttk.Button(btns, text="🧟 Generate monster prompt", command=self.generate_prompt).pack(side="left", padx=6)
         ttk.Button(btns, text="📋 Copy", command=self.open_copy).pack(side="left", padx=6)
+        ttk.Checkbutton(btns, text="Live preview", variable=self.live.enabled).pack(side="left", padx=6)
         if self.prompt_bus:
             ttk.Button(btns, text="➕ Add to Group", command=self.add_to_group).pack(side="left", padx=6)
+            # horde : N variantes du formulaire courant, ajoutées d'un coup
+            horde = tk.Frame(self.frame, bg=WHITE); horde.pack(pady=(0,4))
+            ttk.Label(horde, text="Horde size").pack(side="left")
+            ttk.Spinbox(horde, from_=2, to=500, textvariable=self.horde_n_var, width=5).pack(side="left", padx=(6,12))
+            ttk.Label(horde, text="Diversity").pack(side="left")
+            ttk.Spinbox(horde, from_=0.0, to=1.0, increment=0.1, textvariable=self.horde_div_var, width=5).pack(side="left", padx=(6,12))
+            ttk.Button(horde, text="🐺 Add horde to Group", command=self.add_horde_to_group).pack(side="left", padx=6)
 
         self.output = tk.Text(self.frame, height=8, wrap="word", bg=WHITE)
         self.output.pack(fill="both", expand=True, padx=6, pady=(2,8))
@@ -180,63 +168,69 @@ class MonsterForm:
     def gather_multi(self, key):
         block = self.multi_blocks.get(key)
         if not block: return []
-        vals = [opt for opt, var in block["items"] if var.get()]
+        vals = block["selection"].selected()
         vals += parse_custom_list(block["other_var"].get())
         return [v for v in vals if v]
 
+    # ---- recherche d'options (optionindex, index partagé entre onglets) ----
+    def _find(self, text, key=None):
+        return [value for _kind, _key, value in shared_index().search(text, "monster", key)]
+
+    def _jump_search(self, text):
+        return [(f"{key}: {value}", (key, value)) for _kind, key, value in shared_index().search(text, "monster")]
+
+    def pick_option(self, choice):
+        """Option choisie dans "Find option" : case cochée (filtre du bloc effacé) ou valeur du champ."""
+        key, value = choice
+        block = self.multi_blocks.get(key)
+        if block:
+            if "filter_var" in block: block["filter_var"].set("")
+            selection = block["selection"]
+            selection.set(selection.options.index(value), True)
+        elif key in self.single_vars:
+            var, other = self.single_vars[key]
+            var.set(value); other.set("")
+
+    def _filter_block(self, key):
+        block = self.multi_blocks[key]
+        wanted = shared_index().matching(block["filter_var"].get(), "monster", key)
+        selection = block["selection"]
+        shown = None if wanted is None else [i for i, opt in enumerate(selection.options) if opt in wanted]
+        selection.show_only(shown, block["columns"])
+
     # ---- prompt ----
+    def read_field(self, key):
+        """Valeur courante d'un champ du spec (clé engine)."""
+        if key == "style":  return self.style_var.get()
+        if key == "energy": return self.energy_var.get()
+        if key in self.multi_blocks: return self.gather_multi(key)
+        return self.get_single_choice(key)
+
+    def get_spec(self):
+        """Snapshot des choix du formulaire -> spec pour engine.build_monster_lines."""
+        spec = {"style": self.style_var.get(), "energy": self.energy_var.get()}
+        for key in MONSTER_SINGLE_KEYS: spec[key] = self.get_single_choice(key)
+        for key in MONSTER_MULTI_KEYS:  spec[key] = self.gather_multi(key)
+        return spec
+
     def build_monster_lines(self):
-        intro = self.styles_map.get(self.style_var.get(), next(iter(self.styles_map.values())))
-        lines = [intro]
-
-        sp = self.get_single_choice("Species")
-        size = self.get_single_choice("Size class")
-        temp = self.get_single_choice("Temperament")
-        parts = [sp, size, temp]
-        lines.append("Monster: " + ", ".join([p for p in parts if p]) + ".")
-
-        ana = self.gather_multi("Anatomy")
-        loco = self.gather_multi("Locomotion")
-        beh  = self.gather_multi("Behaviors")
-        if ana:  lines.append(f"Anatomy: {', '.join(ana)}.")
-        if loco: lines.append(f"Locomotion: {', '.join(loco)}.")
-        if beh:  lines.append(f"Behaviors and powers: {', '.join(beh)}.")
-
-        # colors
-        dom = self.get_single_choice("Dominant color")
-        sec = self.get_single_choice("Secondary color")
-        cols = []
-        if dom: cols.append(f"dominant — {dom}")
-        if sec: cols.append(f"secondary — {sec}")
-        if cols:
-            if "black-and-white" in intro.lower() or "monochrome" in intro.lower():
-                lines.append("Color cues (for tonal accents): " + "; ".join(cols) + ".")
-            else:
-                lines.append("Color palette: " + "; ".join(cols) + ".")
-
-        bg  = self.get_single_choice("Background")
-        lit = self.get_single_choice("Lighting")
-        pose= self.get_single_choice("Pose")
-        frm = self.get_single_choice("Framing")
-        if bg:   lines.append(f"Background: {bg}.")
-        if lit:  lines.append(f"Lighting: {lit}.")
-        if pose: lines.append(f"Pose: {pose}.")
-        if frm:  lines.append(f"Shown from {frm}.")
-
-        if self.energy_var.get():
-            lines.append("Add motion cues: debris, dust, splashes or drifting particles appropriate to the biome.")
-
-        return lines
+        return build_monster_lines(self.get_spec(), self.styles_map)
 
     # ---- actions ----
+    def _set_last_prompt(self, text):
+        self._last_prompt, self._last_spec = text, dict(self.live.spec)     # le spec rendu, pas l'état courant
+
     def generate_prompt(self):
-        text = " ".join(self.build_monster_lines())
-        self._last_prompt = text
+        spec = self.get_spec()
+        text = monster_prompt(spec, self.styles_map)
+        self._last_prompt, self._last_spec = text, spec
+        if self.library is not None: self.library.add("monster", self.build_label(), text, spec)
         self.output.delete("1.0","end")
         self.output.insert("1.0", text)
 
     def build_label(self):
-        return self.get_single_choice("Species") or "Monster"
+        """Libellé du dernier spec rendu (même lecture que le moteur)."""
+        return monster_label(self._last_spec or {})
 
     def add_to_group(self):
         if not self._last_prompt.strip():
@@ -244,11 +238,26 @@ class MonsterForm:
             return
         try:
             label = self.build_label()
-            self.prompt_bus.add_monster(label, self._last_prompt, weight=3)
-            messagebox.showinfo("Added", f"Monster added to Group:\n{label}")
+            mid = self.prompt_bus.add_monster(label, self._last_prompt, weight=3, spec=self._last_spec)
+            member = self.prompt_bus.get(mid)
+            messagebox.showinfo("Added", f"Monster added to Group:\n{member_label(member)}")
         except RuntimeError as e:
             messagebox.showerror("Roster full", str(e))
 
+    def add_horde_to_group(self):
+        from horde import horde_specs, push_horde     # import différé : horde.py lit VOCAB (vocab.py), chargé au premier clic
+        try:
+            n = int(self.horde_n_var.get()); diversity = float(self.horde_div_var.get())
+        except (tk.TclError, ValueError):
+            messagebox.showwarning("Horde", "Horde size and diversity must be numbers.")
+            return
+        specs = horde_specs(self.get_spec(), max(1, n), diversity=min(max(diversity, 0.0), 1.0))
+        try:
+            ids = push_horde(self.prompt_bus, specs, self.styles_map)
+        except RuntimeError as e:
+            messagebox.showerror("Roster full", str(e)); return
+        messagebox.showinfo("Added", f"Horde added to Group: {len(ids)} monsters in {len(set(ids))} roster entries.")
+
     def open_copy(self):
         txt = self.output.get("1.0","end-1c").strip()
         if not txt:
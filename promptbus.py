@@ -0,0 +1,169 @@
+# promptbus.py
+"""
+Roster partagé entre les onglets (personnages + monstres), sans Tk.
+Chaque membre reçoit un id stable : les accès par id sont O(1), la position n'est
+recalculée (une fois, O(n)) qu'après un changement de structure.
+Les membres identiques (même empreinte engine.text_key) sont regroupés en une entrée avec "count".
+"""
+import itertools
+from contextlib import contextmanager
+
+from engine import text_key
+
+
+def _item(kind, label, text, weight, spec):
+    item = {"type": kind, "label": label, "text": text, "weight": int(weight)}
+    if spec is not None: item["spec"] = dict(spec, kind=kind)
+    return item
+
+
+# ---------- Shared Prompt Bus ----------
+class PromptBus:
+    """
+    In-memory roster for group mixing (characters + monsters).
+    Each item: {"id": int, "type": "character"|"monster", "label": str, "text": str, "weight": int,
+                "count": int, "key": str, "spec": dict (optionnel, pour régénérer des variantes)}
+
+    Deux façons d'écouter :
+      - register(cb)  : cb(items) avec la liste complète (ancienne API)
+      - subscribe(cb) : cb(events) avec seulement les changements, une liste par notification :
+            ("reset", items) | ("inserted", idx, item) | ("removed", idx, item)
+            | ("moved", old_idx, new_idx) | ("weight", idx, item) | ("count", idx, item)
+    Dans un `with bus.batch():` les événements sont regroupés et émis une seule fois à la fin.
+    """
+    MAX_ITEMS = 5000
+    cluster = True            # False : une entrée par ajout, même identique
+
+    def __init__(self):
+        self.items = []
+        self.listeners = []
+        self.event_listeners = []
+        self._batch_depth = 0
+        self._pending = []
+        self._ids = itertools.count(1)
+        self._by_id = {}
+        self._by_key = {}         # empreinte du texte -> id (regroupement)
+        self._pos = None          # id -> index, reconstruit à la demande
+
+    # ---------- listeners ----------
+    def register(self, callback):
+        self.listeners.append(callback)
+        callback(list(self.items))
+
+    def subscribe(self, callback):
+        self.event_listeners.append(callback)
+        callback([("reset", list(self.items))])
+
+    @contextmanager
+    def batch(self):
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth and self._pending:
+                events, self._pending = self._pending, []
+                self._dispatch(events)
+
+    def _emit(self, event):
+        if self._batch_depth: self._pending.append(event)
+        else:                 self._dispatch([event])
+
+    def _dispatch(self, events):
+        for cb in self.event_listeners:
+            cb(events)
+        if self.listeners:
+            items = list(self.items)
+            for cb in self.listeners:
+                cb(items)
+
+    # ---------- lookup ----------
+    def __len__(self):
+        return len(self.items)
+
+    def get(self, member_id):
+        return self._by_id.get(member_id)
+
+    def index_of(self, member_id):
+        if self._pos is None:
+            self._pos = {it["id"]: i for i, it in enumerate(self.items)}
+        return self._pos.get(member_id)
+
+    # ---------- mutations ----------
+    def add(self, item):
+        """Ajoute un membre ; une copie d'un membre existant incrémente son "count". Renvoie l'id."""
+        item.setdefault("count", 1)
+        if self.cluster:
+            item["key"] = text_key(item["type"], item["text"])
+            same = self._by_key.get(item["key"])
+            if same is not None:
+                idx = self.index_of(same)
+                self.set_count(idx, self.items[idx]["count"] + item["count"])
+                return same
+        if len(self.items) >= self.MAX_ITEMS:
+            raise RuntimeError(f"Roster is full (max {self.MAX_ITEMS}).")
+        item.setdefault("id", next(self._ids))
+        self.items.append(item)
+        self._by_id[item["id"]] = item
+        if self.cluster: self._by_key[item["key"]] = item["id"]
+        if self._pos is not None: self._pos[item["id"]] = len(self.items) - 1
+        self._emit(("inserted", len(self.items) - 1, item))
+        return item["id"]
+
+    def add_character(self, label, text, weight=3, spec=None):
+        return self.add(_item("character", label or "Character", text, weight, spec))
+
+    def add_monster(self, label, text, weight=3, spec=None):
+        return self.add(_item("monster", label or "Monster", text, weight, spec))
+
+    def move_up(self, idx):
+        if 0 < idx < len(self.items):
+            self.items[idx-1], self.items[idx] = self.items[idx], self.items[idx-1]
+            self._swapped(idx-1, idx)
+            self._emit(("moved", idx, idx-1))
+
+    def move_down(self, idx):
+        if 0 <= idx < len(self.items) - 1:
+            self.items[idx+1], self.items[idx] = self.items[idx], self.items[idx+1]
+            self._swapped(idx, idx+1)
+            self._emit(("moved", idx, idx+1))
+
+    def _swapped(self, i, j):
+        if self._pos is not None:
+            self._pos[self.items[i]["id"]] = i
+            self._pos[self.items[j]["id"]] = j
+
+    def remove(self, idx):
+        if 0 <= idx < len(self.items):
+            item = self.items.pop(idx)
+            del self._by_id[item["id"]]
+            if self._by_key.get(item.get("key")) == item["id"]: del self._by_key[item["key"]]
+            self._pos = None
+            self._emit(("removed", idx, item))
+
+    def remove_id(self, member_id):
+        idx = self.index_of(member_id)
+        if idx is not None: self.remove(idx)
+
+    def clear(self):
+        self.items.clear()
+        self._by_id.clear()
+        self._by_key.clear()
+        self._pos = None
+        self._emit(("reset", []))
+
+    def set_weight(self, idx, w):
+        if 0 <= idx < len(self.items):
+            self.items[idx]["weight"] = int(w)
+            self._emit(("weight", idx, self.items[idx]))
+
+    def set_weight_id(self, member_id, w):
+        idx = self.index_of(member_id)
+        if idx is not None: self.set_weight(idx, w)
+
+    def set_count(self, idx, n):
+        """Nombre de copies d'un membre ; 0 le retire."""
+        if 0 <= idx < len(self.items):
+            if n < 1: return self.remove(idx)
+            self.items[idx]["count"] = int(n)
+            self._emit(("count", idx, self.items[idx]))
@@ -0,0 +1,231 @@
+# promptcache.py
+"""
+Cache des prompts finis, adressé par contenu : empreinte de (style, spec normalisé) -> texte.
+
+    character_prompt(spec, styles_map)          -> même texte que " ".join(build_character_lines(...))
+    monster_prompt(spec, styles_map)
+    group_prompt(spec, items, styles_map)
+    CACHE.stats()                               -> hits / misses / evictions / octets
+
+Normalisation : seuls les champs lus par le moteur comptent, avec la même lecture que lui
+("— (leave empty) —", None et "" sont équivalents, espaces retirés, drapeaux absents = True),
+et le style est remplacé par sa phrase d'intro. Deux specs qui rendent le même texte ont donc la même clé.
+L'empreinte inclut aussi celles de engine.py et du vocabulaire (vocab.py) : les modifier invalide tout le cache.
+Calculer l'empreinte coûte autant que rendre un spec : un alias (tuple brut des champs, haché par Python)
+pointe vers l'empreinte déjà calculée, et seul un spec jamais vu paie la normalisation.
+
+Éviction LRU à la taille (octets UTF-8 des textes). Persistance optionnelle (JSON) :
+PROMPT_CACHE=chemin pour l'app, --cache chemin pour batch.py ; save() écrit, le chargement est automatique.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import engine
+from engine import (STYLES, CHARACTER_SINGLE_KEYS, CHARACTER_MULTI_KEYS, MONSTER_SINGLE_KEYS, MONSTER_MULTI_KEYS,
+                    GROUP_KEYS, as_registry, build_character_lines, build_monster_lines, build_group_lines, _multi)
+from vocab import VOCAB
+
+def _engine_salt():
+    """Empreinte de engine.py et du vocabulaire (les presets de race font partie du texte)."""
+    with open(engine.__file__, "rb") as f:
+        return hashlib.blake2b(f.read() + VOCAB.digest.encode(), digest_size=8).hexdigest()
+
+ENGINE_SALT = _engine_salt()
+_FIELDS = {
+    "character": (CHARACTER_SINGLE_KEYS, CHARACTER_MULTI_KEYS, ("gritty", "energy")),
+    "monster": (MONSTER_SINGLE_KEYS, MONSTER_MULTI_KEYS, ("energy",)),
+}
+
+
+# ---------- clés ----------
+def normalize_spec(kind, spec):
+    """Spec character / monster -> liste canonique des seuls champs lus par le moteur."""
+    singles, multis, flags = _FIELDS[kind]
+    g = spec.get
+    out = []
+    for k in singles:          # _single en ligne : appelé ~25 fois par spec
+        v = g(k)
+        if v:
+            if v.__class__ is not str: v = str(v)
+            v = v.strip()
+            if v and v[0] != "—": out.append((k, v))
+    for k in multis:
+        v = _multi(spec, k)
+        if v: out.append((k, v))
+    out.extend((k, bool(g(k, True))) for k in flags)
+    return out
+
+def _typed(v):
+    """Valeur de clé d'alias : 1, 1.0 et True sont égaux pour un dict mais rendus "1", "1.0", "True"."""
+    return v if v.__class__ is str or v is None else (v.__class__.__name__, v)
+
+def raw_key(kind, spec, intro):
+    """Clé rapide non normalisée (alias) ; None si une valeur n'est pas hachable."""
+    singles, multis, flags = _FIELDS[kind]
+    g = spec.get
+    try:
+        singles = tuple([v if v.__class__ is str or v is None else (v.__class__.__name__, v)   # _typed en ligne
+                         for v in map(g, singles)])
+        key = (kind, intro, singles, tuple(tuple(v) if v else None for v in map(g, multis)),
+               tuple(g(k, True) for k in flags))
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+def _digest(obj):
+    raw = json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+def _field(k, v):
+    if v.__class__ is str:  return k + "\x1f" + v
+    if v.__class__ is bool: return k + ("\x1f1" if v else "\x1f0")
+    return k + "\x1f" + "\x1f".join(map(str, v))
+
+def spec_key(kind, spec, styles_map=STYLES, intro=None):
+    """Empreinte canonique (hex). Sérialisation par séparateurs plutôt que JSON : 3x plus rapide."""
+    intro = intro or as_registry(styles_map).resolve(spec.get("style")).intro
+    raw = "\x1e".join([ENGINE_SALT, kind, intro, *(_field(k, v) for k, v in normalize_spec(kind, spec))])
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+def _group_parts(spec, items, styles_map):
+    intro = as_registry(styles_map).resolve(spec.get("style")).intro
+    scene = tuple((k, spec.get(k)) for k in GROUP_KEYS if k != "style" and k in spec)
+    roster = tuple((it["type"], it["label"], it["weight"], it.get("count", 1), it["text"]) for it in items)
+    return ("group", intro, scene, roster)
+
+def group_key(spec, items, styles_map=STYLES):
+    return _digest([ENGINE_SALT, *_group_parts(spec, items, styles_map)])
+
+
+# ---------- cache ----------
+class PromptCache:
+    """LRU clé -> prompt, borné en octets ; thread-safe (server.py rend depuis plusieurs threads)."""
+    def __init__(self, max_bytes=16 * 1024 * 1024, path=None):
+        self.max_bytes = max_bytes
+        self.path = path
+        self._data = OrderedDict()      # clé -> (texte, octets)
+        self._alias = {}                # clé brute -> clé (voir raw_key)
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._data.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, text):
+        size = len(text.encode("utf-8"))
+        if size > self.max_bytes: return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old: self.nbytes -= old[1]
+            self._data[key] = (text, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _k, (_t, n) = self._data.popitem(last=False)
+                self.nbytes -= n
+                self.evictions += 1
+
+    def get_or_build(self, key, build, alias=None):
+        """
+        key : empreinte, ou fonction qui la calcule (appelée seulement si `alias` ne mène pas déjà
+        à une entrée). build() rend le texte en cas d'absence.
+        """
+        if alias is not None:
+            with self._lock:
+                entry = self._data.get(self._alias.get(alias))
+                if entry is not None:
+                    self.hits += 1
+                    self._data.move_to_end(self._alias[alias])
+                    return entry[0]
+        if callable(key): key = key()
+        text = self.get(key)
+        if text is None:
+            text = build()
+            self.put(key, text)
+        if alias is not None:
+            with self._lock:
+                if len(self._alias) >= 4 * max(len(self._data), 1024): self._alias.clear()
+                self._alias[alias] = key
+        return text
+
+    def clear(self):
+        with self._lock:
+            self._data.clear(); self._alias.clear(); self.nbytes = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {"entries": len(self._data), "bytes": self.nbytes, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "hit_rate": self.hits / total if total else 0.0}
+
+    # ---------- persistance ----------
+    def save(self, path=None):
+        """Écrit les entrées (ordre LRU) en JSON ; écriture atomique (fichier temporaire + replace)."""
+        path = path or self.path
+        if not path: return
+        with self._lock:
+            entries = [[k, t] for k, (t, _n) in self._data.items()]
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"engine": ENGINE_SALT, "entries": entries}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def load(self, path=None):
+        """Recharge un fichier de save() ; ignoré s'il est illisible ou d'une autre version du moteur."""
+        path = path or self.path
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if data.get("engine") != ENGINE_SALT: return 0
+        for key, text in data.get("entries", []):
+            self.put(key, text)
+        return len(data.get("entries", []))
+
+
+CACHE = PromptCache(path=os.environ.get("PROMPT_CACHE") or None)
+
+
+# ---------- builders mis en cache ----------
+def _spec_prompt(kind, build, spec, styles_map, cache):
+    cache = CACHE if cache is None else cache
+    intro = as_registry(styles_map).resolve(spec.get("style")).intro
+    return cache.get_or_build(lambda: spec_key(kind, spec, styles_map, intro),
+                              lambda: " ".join(build(spec, styles_map)), raw_key(kind, spec, intro))
+
+def character_prompt(spec, styles_map=STYLES, cache=None):
+    return _spec_prompt("character", build_character_lines, spec, styles_map, cache)
+
+def monster_prompt(spec, styles_map=STYLES, cache=None):
+    return _spec_prompt("monster", build_monster_lines, spec, styles_map, cache)
+
+def group_prompt(spec, items, styles_map=STYLES, cache=None):
+    cache = CACHE if cache is None else cache
+    parts = _group_parts(spec, items, styles_map)
+    kind, intro, scene, roster = parts
+    try:
+        alias = (kind, intro, tuple((k, _typed(v)) for k, v in scene),
+                 tuple((t, label, _typed(w), _typed(n), text) for t, label, w, n, text in roster))
+        hash(alias)
+    except TypeError:
+        alias = None
+    return cache.get_or_build(lambda: _digest([ENGINE_SALT, *parts]),
+                              lambda: " ".join(build_group_lines(spec, items, styles_map)), alias)
@@ -0,0 +1,287 @@
+# rules.py
+"""
+Règles de compatibilité entre les choix du formulaire Character, et tirage aléatoire qui les respecte.
+
+Les règles sont déclaratives (tables ci-dessous) puis compilées en masques de bits :
+chaque option (champ, valeur) reçoit un bit, et excl[bit] = masque des options incompatibles.
+
+    rules = RuleSet()
+    rules.conflicts(spec)                    -> [(option, option)] en conflit
+    ConstrainedSampler(rules).sample(1000)   -> specs toutes valides, sans rejet :
+        chaque choix retire de la suite les options qu'il exclut (propagation).
+    Validator(character_space()).valid(spec) -> contrôle précompilé par champ (tables + OR/AND d'entiers)
+"""
+import random
+import re
+
+from engine import RACE_PRESETS, _single, _multi
+from vocab import VOCAB
+from specspace import character_space
+
+
+# ---------- tables ----------
+def _o(field, *values):
+    return [(field, v) for v in values]
+
+_BEARDS = _o("Facial Hair", "Stubble Beard", "Goatee", "Full/Thick Beard", "Groomed Beard")
+_TUSKS = _o("Body Traits", "Mouth slightly open, lower tusks visible", "Small lower tusks clearly visible")
+_HAIRY = _o("Body Hair", "Light body hair", "Moderate body hair", "Heavy body hair", "Chest hair", "Arm hair",
+            "Leg hair", "Back hair", "Armpit hair", "Happy trail")
+_YOUNG = _o("Age", "Childlike", "Teenager")
+
+# Au plus une option de chaque groupe
+EXCLUSIVE = [
+    _o("Head Hair", "Curly Hair", "Wavy Hair", "Straight Hair"),
+    _o("Head Hair", "Long Hair", "Short Hair"),
+    _o("Body Hair", "Light body hair", "Moderate body hair", "Heavy body hair"),
+    _o("Facial Hair", "Stubble Beard", "Full/Thick Beard"),
+    _o("Facial Hair", "Handlebar Mustache", "Chevron Mustache"),
+    _o("Framing", "Front View", "Back View", "Profile View"),
+]
+
+# (côté A, côté B) : aucune option de A avec une option de B
+CONFLICTS = [
+    (_o("Facial Hair", "No Beard"), _BEARDS),
+    (_o("Facial Hair", "Mustache Only"), _BEARDS),
+    (_o("Head Hair", "Shaved"), _o("Head Hair", "Long Hair", "Short Hair", "Curly Hair", "Wavy Hair", "Straight Hair",
+                                   "Ponytail", "Multiple Braids", "Long and Braided", "Messy", "Half Bald",
+                                   "White Streak", "Graying Temples")),
+    (_o("Head Hair", "Short Hair"), _o("Head Hair", "Ponytail", "Long and Braided")),
+    (_o("Body Hair", "No body hair"), _HAIRY),
+    (_o("Head/Face Traits", "Missing Eye", "Blindfolded"), _o("Head/Face Traits", "Heterochromia") + _o("Eye Color", "Heterochromia")),
+    (_o("Head/Face Traits", "Blindfolded"), _o("Head/Face Traits", "Glowing Eyes") + _o("Gaze Direction", "Eyes to camera")),
+    (_YOUNG, _BEARDS + _o("Facial Hair", "Handlebar Mustache", "Chevron Mustache") + _o("Head Hair", "Graying Temples")
+             + _o("Hair Color", "Salt-and-pepper", "Grey") + _o("Head/Face Traits", "Wrinkled") + _o("Facial Expression", "Wrinkled")),
+    (_o("Body Traits", "Pale Skin"), _o("Skin Tone", "Tan", "Brown", "Dark Brown", "Ebony")),
+    (_o("Framing", "Head Only"), _o("Framing", "Bust", "Chest-up", "Half Body", "Medium Long Shot", "Full Body")),
+]
+
+# Options réservées à certaines races (race vide = pas de contrainte)
+RACE_ONLY = {opt: {"Orc", "Half-Orc"} for opt in _TUSKS}
+
+# Mot-clé dans le "avoid" d'un preset -> options interdites pour cette race
+# (début de mot : "tan" couvre "tanned" mais pas "stand" ni "distant")
+AVOID_KEYWORDS = [
+    ("human nose", _o("Body Traits", "Broad nose")),
+    ("human facial structure", _o("Body Traits", "Broad nose")),
+    ("heavy jaw", _o("Body Traits", "Pronounced jawline")),
+    ("coarse human jaw", _o("Body Traits", "Pronounced jawline")),
+    ("orcish", _TUSKS + _o("Body Traits", "Heavy brow ridge")),
+    ("pores", _o("Body Traits", "Rough textured skin with visible pores")),
+    ("tan", _o("Skin Tone", "Tan")),
+    ("delicate beauty", _o("Attractiveness", "Ethereal (5)")),
+    ("beauty portrait", _o("Attractiveness", "Striking (4)", "Ethereal (5)")),
+]
+# Mot-clé dans les lignes d'un preset -> options qui le contredisent
+LINE_KEYWORDS = [
+    ("Long pointed ears", _o("Body Traits", "Slightly pointed ears")),
+    ("Large lower tusks", _o("Body Traits", "Small lower tusks clearly visible")),
+    ("no human nose or lips", _o("Body Traits", "Broad nose", "Mouth slightly open, lower tusks visible")),
+]
+
+
+# ---------- compilation ----------
+class RuleSet:
+    """Tables -> un bit par option du vocabulaire, excl[bit] = options incompatibles (relation symétrique)."""
+    def __init__(self, single_options=VOCAB.single("character"), multi_options=VOCAB.multi("character"),
+                 presets=RACE_PRESETS):
+        self.single_options, self.multi_options = single_options, multi_options
+        self.bit = {}
+        for field, options in list(single_options.items()) + list(multi_options.items()):
+            for v in options: self.bit[(field, v)] = len(self.bit)
+        self.atoms = list(self.bit)
+        self.excl = [0] * len(self.atoms)
+        for group in EXCLUSIVE:
+            for a in group: self._ban([a], [b for b in group if b != a])
+        for side_a, side_b in CONFLICTS: self._ban(side_a, side_b)
+        for opt, races in RACE_ONLY.items():
+            self._ban([opt], [("Race", r) for r in single_options.get("Race", ()) if r not in races])
+        for race, preset in presets.items():
+            avoid, lines = preset.get("avoid", "").lower(), " ".join(preset.get("lines", []))
+            for kw, opts in AVOID_KEYWORDS:
+                if re.search(rf"\b{re.escape(kw)}\w*\b", avoid): self._ban([("Race", race)], opts)
+            for kw, opts in LINE_KEYWORDS:
+                if kw in lines: self._ban([("Race", race)], opts)
+
+    def _ban(self, side_a, side_b):
+        for a in side_a:
+            for b in side_b:
+                ia, ib = self.bit.get(a), self.bit.get(b)
+                if ia is None or ib is None: continue        # option absente du vocabulaire courant
+                self.excl[ia] |= 1 << ib
+                self.excl[ib] |= 1 << ia
+
+    def atoms_of(self, spec):
+        """Options du vocabulaire présentes dans le spec (le texte libre est ignoré)."""
+        out = []
+        for field in self.single_options:
+            v = _single(spec, field)
+            if (field, v) in self.bit: out.append((field, v))
+        for field in self.multi_options:
+            out.extend((field, v) for v in _multi(spec, field) or [] if (field, v) in self.bit)
+        return out
+
+    def conflicts(self, spec):
+        """Paires d'options incompatibles dans le spec (vide = spec valide)."""
+        bits = [(a, self.bit[a]) for a in self.atoms_of(spec)]
+        return [(a, b) for i, (a, ia) in enumerate(bits) for b, ib in bits[i + 1:] if self.excl[ia] >> ib & 1]
+
+    def is_valid(self, spec):
+        bits = [self.bit[a] for a in self.atoms_of(spec)]
+        mask = 0
+        for b in bits: mask |= 1 << b
+        return not any(self.excl[b] & mask for b in bits)
+
+
+# ---------- validation compilée ----------
+class Validator:
+    """
+    Validation sur les chiffres d'un SpecSpace (indice d'option / masque de bloc), sans dict ni chaînes.
+    Chaque champ concerné par une règle a une table chiffre -> (bits présents, bits exclus) ;
+    les blocs multi sont découpés en tranches de CHUNK bits (une table de 2^CHUNK entrées par tranche).
+    Un spec est valide si (OR des bits présents) & (OR des bits exclus) == 0.
+    Les champs sans aucune règle (style, rôle, décor...) ne coûtent rien.
+    """
+    CHUNK = 8
+
+    def __init__(self, space=None, rules=None):
+        self.space = space or character_space()
+        self.rules = rules or RuleSet()
+        bit, excl = self.rules.bit, self.rules.excl
+        self.base_mask = self.base_excl = 0
+        varied = {f[0] for f in self.space.fields}
+        for a in self.rules.atoms_of({k: v for k, v in self.space.base.items() if k not in varied}):
+            self.base_mask |= 1 << bit[a]; self.base_excl |= excl[bit[a]]
+        self.singles, self.multis = [], []
+        for pos, (key, options, is_multi, empty, _radix, _p) in enumerate(self.space.fields):
+            bits = [bit.get((key, o)) for o in options]
+            if not any(b is not None and excl[b] for b in bits): continue
+            entries = [(0, 0) if b is None else (1 << b, excl[b]) for b in bits]
+            if not is_multi:
+                self.singles.append((pos, [(0, 0)] * empty + entries))
+                continue
+            for start in range(0, len(entries), self.CHUNK):
+                part = entries[start:start + self.CHUNK]
+                table = [(0, 0)] * (1 << len(part))
+                for byte in range(1, len(table)):
+                    low = byte & -byte                                  # table[byte] = table[byte sans son bit bas] + ce bit
+                    m, e = table[byte ^ low]; bm, be = part[low.bit_length() - 1]
+                    table[byte] = (m | bm, e | be)
+                self.multis.append((pos, start, (1 << len(part)) - 1, table))
+        # specs dict : valeur -> (bits présents, bits exclus), pour les seuls champs qui ont une règle
+        self.value_singles, self.value_multis = [], []
+        for fields, out in ((self.rules.single_options, self.value_singles), (self.rules.multi_options, self.value_multis)):
+            for key, options in fields.items():
+                table = {o: (1 << bit[(key, o)], excl[bit[(key, o)]]) for o in options if excl[bit[(key, o)]]}
+                if table: out.append((key, table))
+
+    def valid_digits(self, digits):
+        m, e = self.base_mask, self.base_excl
+        for pos, table in self.singles:
+            bm, be = table[digits[pos]]; m |= bm; e |= be
+        for pos, shift, low, table in self.multis:
+            bm, be = table[digits[pos] >> shift & low]; m |= bm; e |= be
+        return not m & e
+
+    def valid_index(self, index):
+        return self.valid_digits(self.space.digits(index))
+
+    def valid(self, spec):
+        """
+        Spec dict (style absent ou inconnu, texte libre : peu importe) : seuls les champs qui ont une règle
+        sont lus ; un texte hors vocabulaire est ignoré, comme dans RuleSet.is_valid.
+        """
+        m = e = 0
+        for key, table in self.value_singles:
+            hit = table.get(_single(spec, key))
+            if hit: m |= hit[0]; e |= hit[1]
+        for key, table in self.value_multis:
+            for v in _multi(spec, key) or ():
+                hit = table.get(v)
+                if hit: m |= hit[0]; e |= hit[1]
+        return not m & e
+
+    def valid_batch(self, batch):
+        """sampler.SpecBatch -> liste de booléens (colonnes lues une fois)."""
+        cols = [batch.columns[f[0]].tolist() for f in self.space.fields]
+        return [self.valid_digits(digits) for digits in zip(*cols)]
+
+    def explain(self, spec):
+        """Conflits lisibles : ["Race: Elf <> Body Traits: Slightly pointed ears", ...]."""
+        return [f"{fa}: {va} <> {fb}: {vb}" for (fa, va), (fb, vb) in self.rules.conflicts(spec)]
+
+
+# ---------- tirage sous contraintes ----------
+class ConstrainedSampler:
+    """
+    Tire des specs character valides du premier coup : les champs sont choisis un à un
+    (race et âge d'abord, ce sont eux qui contraignent le plus), chaque choix ajoute ses
+    exclusions au masque `banned`, et les choix suivants ne voient que les options restantes.
+    Mêmes paramètres que sampler.sample : p_empty (champ simple vide), multi_p (par option).
+    """
+    FIRST = ("Race", "Age")
+
+    def __init__(self, rules=None, p_empty=0.2, multi_p=0.1, base=None):
+        self.rules = rules or RuleSet()
+        self.p_empty, self.multi_p = p_empty, multi_p
+        self.base = dict(base or {})
+        singles = [f for f in self.FIRST if f in self.rules.single_options]
+        singles += [f for f in self.rules.single_options if f not in singles]
+        fields = [(f, self.rules.single_options[f]) for f in singles]
+        self.singles = [self._field(f, opts) for f, opts in fields]
+        self.multis = [self._field(f, opts) for f, opts in self.rules.multi_options.items()]
+
+    def _field(self, field, options):
+        """(champ, [(valeur, bit)], masque des bits du champ)."""
+        pairs = [(v, self.rules.bit[(field, v)]) for v in options]
+        mask = 0
+        for _v, b in pairs: mask |= 1 << b
+        return field, pairs, mask
+
+    def draw(self, rng=random):
+        excl, banned = self.rules.excl, 0
+        spec = {"kind": "character"}
+        spec.update(self.base)
+        for field, options, field_mask in self.singles:
+            if rng.random() < self.p_empty:
+                spec[field] = None; continue
+            if banned & field_mask:
+                options = [(v, b) for v, b in options if not banned >> b & 1]
+                if not options:
+                    spec[field] = None; continue
+            v, b = rng.choice(options)
+            spec[field] = v; banned |= excl[b]
+        for field, options, field_mask in self.multis:
+            p = self.multi_p.get(field, 0.1) if isinstance(self.multi_p, dict) else self.multi_p
+            picked = [(i, b) for i, (v, b) in enumerate(options) if rng.random() < p]
+            if len(picked) > 1: rng.shuffle(picked)              # l'ordre décide qui gagne un conflit : pas de biais
+            kept = []
+            for i, b in picked:
+                if not banned >> b & 1:
+                    kept.append(i); banned |= excl[b]
+            kept.sort()
+            spec[field] = [options[i][0] for i in kept]
+        return spec
+
+    def sample(self, n, seed=None):
+        rng = random.Random(seed)
+        return [self.draw(rng) for _ in range(n)]
+
+
+def naive_draw(rules, rng=random, p_empty=0.2, multi_p=0.1):
+    """Tirage sans contraintes (référence pour le benchmark du rejet)."""
+    spec = {"kind": "character"}
+    for field, options in rules.single_options.items():
+        spec[field] = None if rng.random() < p_empty else rng.choice(options)
+    for field, options in rules.multi_options.items():
+        spec[field] = [v for v in options if rng.random() < multi_p]
+    return spec
+
+def rejection_sample(rules, n, seed=None, p_empty=0.2, multi_p=0.1):
+    """Tire jusqu'à obtenir n specs valides -> (specs, nb de tirages)."""
+    rng = random.Random(seed)
+    out, draws = [], 0
+    while len(out) < n:
+        spec = naive_draw(rules, rng, p_empty, multi_p); draws += 1
+        if rules.is_valid(spec): out.append(spec)
+    return out, draws
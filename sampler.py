@@ -0,0 +1,91 @@
+# sampler.py
+"""
+Tirage aléatoire en masse de specs character / monster (reproductible via seed).
+
+Les tirages sont faits par lots entiers sous forme de tableaux NumPy d'indices :
+    - une colonne d'entiers par champ simple (0 = vide, sinon 1 + indice de l'option)
+    - une colonne de masques de bits (uint64) par bloc multi
+Mêmes chiffres que specspace.SpecSpace : rien n'est converti en texte tant qu'on ne le demande pas.
+
+    batch = sample_characters(1_000_000, seed=42, multi_p={"Accessories": 0.05})
+    batch.spec(17)           -> dict spec
+    for prompt in batch.prompts(): ...
+
+NumPy est requis pour ce module seulement (l'application reste sans dépendance).
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from engine import STYLES
+from specspace import character_space, monster_space
+import batch as _batch
+
+
+class SpecBatch:
+    """Lot de specs en colonnes NumPy ; décodage et rendu à la demande."""
+    def __init__(self, space, columns):
+        self.space = space
+        self.columns = columns            # {key: ndarray}, dans l'ordre de space.fields
+        self._keys = [f[0] for f in space.fields]
+
+    def __len__(self):
+        return len(self.columns[self._keys[0]]) if self._keys else 0
+
+    def digits(self, i):
+        return [int(self.columns[k][i]) for k in self._keys]
+
+    def spec(self, i):
+        return self.space.from_digits(self.digits(i))
+
+    def __iter__(self):
+        cols = [self.columns[k].tolist() for k in self._keys]
+        for digits in zip(*cols):
+            yield self.space.from_digits(digits)
+
+    def prompts(self, styles_map=STYLES):
+        for spec in self:
+            yield _batch.render(spec, styles_map)[2]
+
+    def indices(self):
+        """Indices dans space (entiers Python : l'espace dépasse souvent 64 bits)."""
+        return [self.space.index(spec) for spec in self]
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("sampler requires NumPy (pip install numpy)")
+
+def sample(space, n, seed=None, p_empty=0.2, multi_p=0.1):
+    """
+    Tire n specs dans space.
+    p_empty : probabilité qu'un champ simple reste vide.
+    multi_p : probabilité de cocher chaque option d'un bloc multi (float, ou {clé bloc: float}).
+    """
+    _require_numpy()
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for key, options, is_multi, empty, radix, _pos in space.fields:
+        k = len(options)
+        if is_multi:
+            if k > 64:
+                raise ValueError(f"{key}: too many options for a 64-bit mask ({k})")
+            p = multi_p.get(key, 0.1) if isinstance(multi_p, dict) else multi_p
+            # une option à la fois : mémoire O(n) (un tableau n x k coûte des Go sur des millions de specs)
+            mask = np.zeros(n, dtype=np.uint64)
+            for j in range(k):
+                np.bitwise_or(mask, np.uint64(1 << j), out=mask, where=rng.random(n) < p)
+            columns[key] = mask
+        else:
+            col = rng.integers(int(empty), radix, size=n, dtype=np.int16)
+            if empty and p_empty:
+                col[rng.random(n) < p_empty] = 0
+            columns[key] = col
+    return SpecBatch(space, columns)
+
+def sample_characters(n, seed=None, keys=None, base=None, p_empty=0.2, multi_p=0.1):
+    return sample(character_space(keys, base=base), n, seed=seed, p_empty=p_empty, multi_p=multi_p)
+
+def sample_monsters(n, seed=None, keys=None, base=None, p_empty=0.2, multi_p=0.1):
+    return sample(monster_space(keys, base=base), n, seed=seed, p_empty=p_empty, multi_p=multi_p)
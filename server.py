@@ -0,0 +1,265 @@
+# server.py
+"""
+Service HTTP local de prompts (stdlib seulement), mêmes builders que les formulaires et batch.py.
+
+    python server.py --port 8765
+
+    POST /character   {"Race": "Elf", ...}                     -> {"kind", "label", "prompt"}
+    POST /monster     {"Species": "Goblin", ...}
+    POST /group       {"action": "Duel", "items": [...]}
+    POST /render      {"kind": "monster", ...}                  (kind dans le corps)
+    Corps = liste de specs -> liste de réponses, dans le même ordre (une erreur par élément si besoin).
+    GET  /styles      -> noms des styles
+    GET  /stats       -> compteurs du cache de réponses (+ "prompts" : cache de promptcache.py)
+
+    python server.py --load --requests 5000 --concurrency 8 --batch 1 --distinct 200
+        -> générateur de charge local (serveur démarré en arrière-plan, ou --url) : req/s, p50/p99
+
+HTTP/1.1 keep-alive : une connexion sert plusieurs requêtes. Une requête est servie par un thread.
+Les réponses sont mises en cache (LRU borné en octets, comme promptcache.py) par (chemin, corps JSON canonique).
+"""
+import http.client
+import json
+import random
+import threading
+import time
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from engine import STYLES
+from batch import render
+from promptcache import CACHE
+
+KINDS = {"/character": "character", "/monster": "monster", "/group": "group", "/render": None}
+MAX_BODY = 16 * 1024 * 1024
+
+
+class ResponseCache:
+    """LRU thread-safe : clé -> corps de réponse (bytes), borné par max_bytes (clés + corps)."""
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()      # clé -> (corps, octets)
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._data.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, body):
+        size = len(key.encode("utf-8")) + len(body)
+        if size > self.max_bytes: return         # 0 = pas de cache ; une réponse trop grosse n'évince pas tout
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old: self.nbytes -= old[1]
+            self._data[key] = (body, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _k, (_b, n) = self._data.popitem(last=False)
+                self.nbytes -= n
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._data), "bytes": self.nbytes, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses}
+
+
+# ---------- rendering ----------
+def _render_one(spec, kind):
+    if not isinstance(spec, dict):
+        return {"error": "spec must be a JSON object"}
+    if kind: spec = dict(spec, kind=kind)
+    try:
+        kind, label, prompt = render(spec, STYLES)
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+    return {"kind": kind, "label": label, "prompt": prompt}
+
+def handle_body(path, payload):
+    """Corps JSON décodé -> réponse (objet, ou liste pour un lot)."""
+    kind = KINDS[path]
+    if isinstance(payload, list):
+        return [_render_one(spec, kind) for spec in payload]
+    return _render_one(payload, kind)
+
+
+class PromptHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"          # keep-alive
+    disable_nagle_algorithm = True         # en-têtes et corps partent en deux écritures : sinon ~40 ms (ACK retardé)
+    server_version = "PromptService/1.0"
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _send(self, status, body, content_type="application/json; charset=utf-8"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, obj):
+        self._send(status, json.dumps(obj, ensure_ascii=False).encode("utf-8"))
+
+    def do_GET(self):
+        if self.path == "/styles":
+            self._send_json(200, list(STYLES))
+        elif self.path == "/stats":
+            self._send_json(200, dict(self.server.cache.stats(), prompts=CACHE.stats()))
+        else:
+            self._send_json(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True            # corps de longueur inconnue : impossible de resynchroniser
+            return self._send_json(400, {"error": "invalid Content-Length"})
+        if length > MAX_BODY:
+            self.close_connection = True
+            return self._send_json(413, {"error": "request body too large"})
+        raw = self.rfile.read(length)
+        if self.path not in KINDS:
+            return self._send_json(404, {"error": f"unknown path {self.path}"})
+        try:
+            payload = json.loads(raw or b"null")
+        except (ValueError, RecursionError) as e:      # RecursionError : imbrication trop profonde ("[[[[...")
+            return self._send_json(400, {"error": f"invalid JSON: {e}"})
+        key = self.path + "\0" + json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        body = self.server.cache.get(key)
+        if body is None:
+            result = handle_body(self.path, payload)
+            if isinstance(result, dict) and "error" in result:    # spec seul invalide : 400 (un lot garde ses erreurs par élément)
+                return self._send_json(400, result)
+            body = json.dumps(result, ensure_ascii=False).encode("utf-8")
+            self.server.cache.put(key, body)
+        self._send(200, body)
+
+
+class PromptServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, cache_bytes=16 * 1024 * 1024, verbose=False):
+        super().__init__(address, PromptHandler)
+        self.cache = ResponseCache(cache_bytes)
+        self.verbose = verbose
+
+
+def serve_in_thread(host="127.0.0.1", port=0, cache_bytes=16 * 1024 * 1024):
+    """Démarre un serveur en arrière-plan (port 0 = libre) -> (server, url). server.shutdown() pour arrêter."""
+    server = PromptServer((host, port), cache_bytes=cache_bytes)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+# ---------- load generator ----------
+def _percentile(sorted_vals, p):
+    return sorted_vals[min(len(sorted_vals) - 1, int(p / 100 * len(sorted_vals)))]
+
+def load_specs(n, seed=0):
+    """n specs aléatoires (personnages et monstres), tirés dans les SpecSpace."""
+    from specspace import character_space, monster_space
+    rng = random.Random(seed)
+    spaces = (character_space(), monster_space())
+    return [sp[rng.randrange(sp.size)] for sp in (spaces[i % 2] for i in range(n))]
+
+def load_test(url, specs, requests=2000, concurrency=8, batch=1, seed=0):
+    """
+    `concurrency` threads, une connexion keep-alive chacun, `requests` POST /render au total
+    (chaque corps = `batch` specs tirés dans `specs`). -> dict req/s, prompts/s, p50/p99 (ms), erreurs.
+    """
+    host, _, port = url.split("://", 1)[-1].rstrip("/").partition(":")
+    per = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+
+    def worker(wid, count):
+        rng = random.Random(f"{seed}:{wid}")
+        conn = http.client.HTTPConnection(host, int(port or 80))
+        mine, bad = [], 0
+        for _ in range(count):
+            picked = [rng.choice(specs) for _ in range(batch)]
+            body = json.dumps(picked[0] if batch == 1 else picked).encode("utf-8")
+            t = time.perf_counter()
+            conn.request("POST", "/render", body, {"Content-Type": "application/json"})
+            resp = conn.getresponse(); resp.read()
+            mine.append(time.perf_counter() - t)
+            bad += resp.status != 200
+        conn.close()
+        with lock:
+            latencies.extend(mine); errors[0] += bad
+
+    threads = [threading.Thread(target=worker, args=(i, c)) for i, c in enumerate(per) if c]
+    t0 = time.perf_counter()
+    for th in threads: th.start()
+    for th in threads: th.join()
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    return {"requests": len(latencies), "errors": errors[0], "seconds": elapsed,
+            "rps": len(latencies) / elapsed, "prompts_per_s": len(latencies) * batch / elapsed,
+            "p50_ms": _percentile(latencies, 50) * 1000, "p99_ms": _percentile(latencies, 99) * 1000}
+
+def _get_json(url, path):
+    host, _, port = url.split("://", 1)[-1].rstrip("/").partition(":")
+    conn = http.client.HTTPConnection(host, int(port or 80))
+    conn.request("GET", path)
+    out = json.loads(conn.getresponse().read())
+    conn.close()
+    return out
+
+def run_load(args):
+    server = None
+    url = args.url
+    if not url:
+        server, url = serve_in_thread(args.host, 0, cache_bytes=int(args.cache_mb * 1024 * 1024))
+    specs = load_specs(args.distinct, args.seed)
+    r = load_test(url, specs, args.requests, args.concurrency, args.batch, args.seed)
+    print(f"{url}  concurrency={args.concurrency} batch={args.batch} distinct={args.distinct}")
+    print(f"{r['requests']} requests in {r['seconds']:.2f} s  ->  {r['rps']:.0f} req/s, "
+          f"{r['prompts_per_s']:.0f} prompts/s, errors {r['errors']}")
+    print(f"latency  p50 {r['p50_ms']:.2f} ms   p99 {r['p99_ms']:.2f} ms")
+    print("cache", _get_json(url, "/stats"))
+    if server:
+        server.shutdown(); server.server_close()
+
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description="Local HTTP prompt service (character / monster / group).")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--cache-mb", type=float, default=16, help="response cache size in MB (0 = no cache)")
+    ap.add_argument("-v", "--verbose", action="store_true", help="log every request")
+    lg = ap.add_argument_group("load generator")
+    lg.add_argument("--load", action="store_true", help="run the load generator instead of serving")
+    lg.add_argument("--url", help="target server (default: start one in the background)")
+    lg.add_argument("--requests", type=int, default=2000)
+    lg.add_argument("--concurrency", type=int, default=8, help="client threads (one keep-alive connection each)")
+    lg.add_argument("--batch", type=int, default=1, help="specs per request body")
+    lg.add_argument("--distinct", type=int, default=500, help="distinct specs to draw from (cache hit rate)")
+    lg.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+    if args.load:
+        return run_load(args)
+    server = PromptServer((args.host, args.port), cache_bytes=int(args.cache_mb * 1024 * 1024), verbose=args.verbose)
+    print(f"Serving prompts on http://{args.host}:{server.server_address[1]} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# specspace.py
+"""
+Énumération paresseuse de l'espace des specs (produit cartésien des vocabulaires).
+
+Chaque spec correspond à un entier (numération en base mixte) :
+    space = monster_space(["Species", "Size class", "Temperament"])
+    space.size            -> nombre total de combinaisons
+    space[12345]          -> spec n°12345 (O(nb de champs), rien n'est matérialisé)
+    space.index(spec)     -> inverse de space[i] (space.encode(spec) -> ses chiffres)
+    space.shard(k, n)     -> itérateur sur la k-ième tranche disjointe parmi n (pour les workers)
+
+Champ simple : chiffre 0 = vide (si allow_empty), puis une option par valeur.
+Bloc multi   : chiffre = masque de bits sur les options (bit j -> options[j]).
+"""
+from engine import STYLES, CHARACTER_SINGLE_KEYS, CHARACTER_MULTI_KEYS, MONSTER_SINGLE_KEYS, MONSTER_MULTI_KEYS
+from vocab import VOCAB
+
+
+class SpecSpace:
+    """Espace cartésien indexable. fields = [(key, options, is_multi)], le dernier champ varie le plus vite."""
+    def __init__(self, kind, fields, base=None, allow_empty=True):
+        self.kind = kind
+        self.base = dict(base or {})
+        self.allow_empty = allow_empty
+        self.fields = []
+        for key, options, is_multi in fields:
+            options = list(options)
+            empty = allow_empty and not is_multi and key != "style"
+            radix = (1 << len(options)) if is_multi else len(options) + empty
+            pos = {opt: i for i, opt in enumerate(options)}
+            self.fields.append((key, options, is_multi, empty, radix, pos))
+        self.radices = [f[4] for f in self.fields]
+        self.size = 1
+        for r in self.radices: self.size *= r
+
+    # ---------- digits <-> spec ----------
+    def digits(self, index):
+        if not 0 <= index < self.size:
+            raise IndexError(f"Spec index out of range: {index}")
+        out = [0] * len(self.radices)
+        for i in range(len(self.radices) - 1, -1, -1):
+            index, out[i] = divmod(index, self.radices[i])
+        return out
+
+    def _value(self, field, d):
+        key, options, is_multi, empty, _r, _p = field
+        if is_multi:
+            return [options[j] for j in range(len(options)) if d >> j & 1]
+        if empty:
+            return options[d - 1] if d else None
+        return options[d]
+
+    def from_digits(self, digits):
+        spec = {"kind": self.kind}
+        spec.update(self.base)
+        for field, d in zip(self.fields, digits):
+            spec[field[0]] = self._value(field, d)
+        return spec
+
+    def spec(self, index):
+        return self.from_digits(self.digits(index))
+
+    __getitem__ = spec
+
+    def encode(self, spec):
+        """spec -> chiffres. ValueError si une valeur n'appartient pas au vocabulaire (ex: texte 'Other')."""
+        out = []
+        for key, options, is_multi, empty, radix, pos in self.fields:
+            v = spec.get(key)
+            try:
+                if is_multi:
+                    d = 0
+                    for opt in v or []: d |= 1 << pos[opt]
+                elif empty and not v:
+                    d = 0
+                else:
+                    d = pos[v] + empty
+            except KeyError:
+                raise ValueError(f"{key}: value not in vocabulary: {v!r}") from None
+            out.append(d)
+        return out
+
+    def index(self, spec):
+        """spec -> entier (inverse de space[i]). ValueError comme encode()."""
+        idx = 0
+        for radix, d in zip(self.radices, self.encode(spec)):
+            idx = idx * radix + d
+        return idx
+
+    # ---------- iteration ----------
+    def iter_range(self, start=0, stop=None):
+        """Itère les specs [start, stop) par incrément d'odomètre (pas de divmod par spec)."""
+        stop = self.size if stop is None else min(stop, self.size)
+        if start >= stop: return
+        digits = self.digits(start)
+        values = [self._value(f, d) for f, d in zip(self.fields, digits)]
+        keys = [f[0] for f in self.fields]
+        head = {"kind": self.kind}; head.update(self.base)
+        for _ in range(stop - start):
+            spec = dict(head)
+            spec.update(zip(keys, values))
+            yield spec
+            i = len(digits) - 1
+            while i >= 0:
+                digits[i] += 1
+                if digits[i] < self.radices[i]:
+                    values[i] = self._value(self.fields[i], digits[i]); break
+                digits[i] = 0
+                values[i] = self._value(self.fields[i], 0)
+                i -= 1
+
+    def __iter__(self):
+        return self.iter_range()
+
+    def shard_bounds(self, k, n):
+        if not 0 <= k < n:
+            raise ValueError(f"Shard {k} out of range for {n} shards")
+        return self.size * k // n, self.size * (k + 1) // n
+
+    def shard(self, k, n):
+        """k-ième tranche contiguë parmi n ; les tranches sont disjointes et couvrent tout l'espace."""
+        return self.iter_range(*self.shard_bounds(k, n))
+
+
+# ---------- factories ----------
+def _fields(keys, singles, multis, single_opts, multi_opts):
+    keys = keys or (["style"] + singles + multis)
+    out = []
+    for key in keys:
+        if key == "style":        out.append((key, list(STYLES), False))
+        elif key in single_opts:  out.append((key, single_opts[key], False))
+        elif key in multi_opts:   out.append((key, multi_opts[key], True))
+        else: raise KeyError(f"Unknown field: {key!r}")
+    return out
+
+def character_space(keys=None, base=None, allow_empty=True):
+    """Espace des specs character ; keys restreint les champs qui varient (les autres viennent de base)."""
+    return SpecSpace("character", _fields(keys, CHARACTER_SINGLE_KEYS, CHARACTER_MULTI_KEYS,
+                                          VOCAB.single("character"), VOCAB.multi("character")),
+                     base=base, allow_empty=allow_empty)
+
+def monster_space(keys=None, base=None, allow_empty=True):
+    """Espace des specs monster ; keys restreint les champs qui varient (les autres viennent de base)."""
+    return SpecSpace("monster", _fields(keys, MONSTER_SINGLE_KEYS, MONSTER_MULTI_KEYS,
+                                        VOCAB.single("monster"), VOCAB.multi("monster")),
+                     base=base, allow_empty=allow_empty)
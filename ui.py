@@ -87,3 +87,304 @@ class ScrollFrame(tk.Frame):
     def _on_mousewheel(self, event):
         delta = getattr(event, "delta", 0)
         self.canvas.yview_scroll(-1 if delta > 0 else 1, "units")
+
+
+class MultiSelection:
+    """
+    Sélection d'un bloc multi (cases à cocher) stockée côté Python dans un entier-bitset.
+    Les Checkbuttons n'ont pas de variable Tcl (variable="") : leur callback met le bit à jour,
+    et lire la sélection ne coûte qu'un parcours de bits, sans aller-retour Tcl.
+    """
+    __slots__ = ("options", "mask", "_buttons", "_listeners")
+
+    def __init__(self, options):
+        self.options = list(options)
+        self.mask = 0
+        self._buttons = {}
+        self._listeners = []
+
+    def add_checkbutton(self, parent, idx, **kw):
+        cb = ttk.Checkbutton(parent, text=self.options[idx], variable="", **kw)
+        cb.state(["!alternate", "!selected"])
+        cb.configure(command=lambda: self._on_click(idx, cb))
+        self._buttons[idx] = cb
+        return cb
+
+    def on_change(self, callback):
+        self._listeners.append(callback)
+
+    def _on_click(self, idx, cb):
+        self._set_bit(idx, cb.instate(["selected"]))
+
+    def _set_bit(self, idx, on):
+        self.mask = (self.mask | (1 << idx)) if on else (self.mask & ~(1 << idx))
+        for cb in self._listeners: cb()
+
+    def set(self, idx, on=True):
+        """Coche/décoche par programme (synchronise le widget s'il existe)."""
+        btn = self._buttons.get(idx)
+        if btn is not None: btn.state(["selected" if on else "!selected"])
+        self._set_bit(idx, on)
+
+    def set_values(self, values):
+        wanted = set(values)
+        for i, opt in enumerate(self.options):
+            if bool(self.mask >> i & 1) != (opt in wanted): self.set(i, opt in wanted)
+
+    def clear(self):
+        self.set_values(())
+
+    def show_only(self, indices, columns):
+        """Filtre à la frappe : seules les cases `indices` restent, replacées colonne par colonne (None = toutes)."""
+        shown = range(len(self.options)) if indices is None else sorted(indices)
+        rows = max(1, (len(shown) + columns - 1) // columns)
+        keep = set(shown)
+        for idx, btn in self._buttons.items():
+            if idx not in keep: btn.grid_remove()
+        for n, idx in enumerate(shown):
+            btn = self._buttons.get(idx)
+            if btn is not None: btn.grid(row=n % rows, column=n // rows)
+
+    def selected(self):
+        """Options cochées, dans l'ordre du bloc."""
+        out, m = [], self.mask
+        while m:
+            low = m & -m
+            out.append(self.options[low.bit_length() - 1])
+            m ^= low
+        return out
+
+
+class TypeAhead:
+    """
+    Combobox en lecture seule : les touches tapées forment une requête, la liste déroulante ne garde
+    que search(requête) et la première option trouvée est choisie. Échap, perte du focus ou une pause
+    (delay_ms) remettent la liste complète ; flèches, Tab et Entrée gardent leur comportement.
+    """
+    def __init__(self, combo, values, search, delay_ms=1200):
+        self.combo = combo
+        self.values = list(values)
+        self.search = search
+        self.delay_ms = delay_ms
+        self.query = ""
+        self._job = None
+        combo.bind("<KeyPress>", self._on_key, add="+")
+        combo.bind("<FocusOut>", lambda e: self.reset(), add="+")
+
+    def _on_key(self, event):
+        if event.keysym == "Escape":
+            self.reset(); return "break"
+        if event.keysym == "BackSpace":
+            self.query = self.query[:-1]
+        elif event.char and event.char.isprintable():
+            self.query += event.char
+        else:
+            return None
+        if self._job is not None: self.combo.after_cancel(self._job)
+        self._job = self.combo.after(self.delay_ms, self.reset)
+        hits = self.search(self.query) if self.query.strip() else []
+        if hits:
+            self.combo.configure(values=hits)
+            self.combo.set(hits[0])
+        elif not self.query:
+            self.combo.configure(values=self.values)
+        return "break"
+
+    def reset(self):
+        if self._job is not None:
+            self.combo.after_cancel(self._job); self._job = None
+        self.query = ""
+        self.combo.configure(values=self.values)
+
+
+class JumpBox(tk.Frame):
+    """
+    Champ "aller à une option" : search(texte) -> [(libellé, valeur)] à chaque frappe, résultats dans
+    une liste sous le champ (masquée sans résultat). Entrée ou double-clic : on_pick(valeur) ;
+    ↓ passe dans la liste, Échap vide le champ.
+    """
+    def __init__(self, parent, search, on_pick, label="Find option:", height=8, width=32):
+        super().__init__(parent, bg=WHITE)
+        self.search = search
+        self.on_pick = on_pick
+        self.var = tk.StringVar()
+        self._hits = []
+        self._shown = False
+        bar = tk.Frame(self, bg=WHITE); bar.pack(fill="x")
+        ttk.Label(bar, text=label).pack(side="left")
+        self.entry = ttk.Entry(bar, textvariable=self.var, width=width)
+        self.entry.pack(side="left", padx=(6,0))
+        self.listbox = tk.Listbox(self, height=height, activestyle="dotbox", exportselection=False)
+        self.var.trace_add("write", lambda *_a: self._update())
+        self.entry.bind("<Return>", lambda e: self._pick(0))
+        self.entry.bind("<Down>", self._enter_list)
+        self.entry.bind("<Escape>", lambda e: self.var.set(""))
+        self.listbox.bind("<Return>", lambda e: self._pick_selected())
+        self.listbox.bind("<Double-Button-1>", lambda e: self._pick_selected())
+        self.listbox.bind("<Escape>", lambda e: (self.var.set(""), self.entry.focus_set()))
+
+    def _update(self):
+        text = self.var.get()
+        self._hits = self.search(text) if text.strip() else []
+        lb = self.listbox
+        lb.delete(0, "end")
+        if self._hits:
+            lb.insert("end", *[label for label, _v in self._hits])
+            lb.selection_set(0)
+            if not self._shown: lb.pack(fill="x", pady=(2,0)); self._shown = True
+        elif self._shown:
+            lb.pack_forget(); self._shown = False
+
+    def _enter_list(self, _event=None):
+        if self._hits:
+            self.listbox.focus_set(); self.listbox.activate(0)
+        return "break"
+
+    def _pick_selected(self):
+        sel = self.listbox.curselection()
+        self._pick(int(sel[0]) if sel else 0)
+
+    def _pick(self, i):
+        if i < len(self._hits):
+            value = self._hits[i][1]
+            self.var.set("")
+            self.entry.focus_set()
+            self.on_pick(value)
+
+
+class LivePreview:
+    """
+    Aperçu live d'un formulaire.
+    Chaque changement de champ appelle touch(key) : la clé est notée "sale" et un rendu est
+    programmé (debounce, delay_ms). Au rendu, seuls les champs sales sont relus depuis Tk,
+    puis render(spec) -> texte ; le Text n'est réécrit que si le texte a changé.
+    """
+    def __init__(self, widget, output, read_field, render, on_text=None, delay_ms=150):
+        self.widget = widget
+        self.output = output
+        self.read_field = read_field
+        self.render = render
+        self.on_text = on_text
+        self.delay_ms = delay_ms
+        self.enabled = tk.BooleanVar(value=False)
+        self.enabled.trace_add("write", lambda *_a: self._toggled())
+        self.spec = {}
+        self._dirty = set()
+        self._all_keys = set()
+        self._job = None
+        self._text = None
+
+    def track(self, key):
+        self._all_keys.add(key)
+        self._dirty.add(key)
+
+    def touch(self, key):
+        self._dirty.add(key)
+        if self.enabled.get(): self._schedule()
+
+    def _toggled(self):
+        if self.enabled.get():
+            self._dirty |= self._all_keys
+            self._schedule()
+
+    def _schedule(self):
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+        self._job = self.widget.after(self.delay_ms, self.refresh)
+
+    def refresh(self):
+        self._job = None
+        for key in self._dirty:
+            self.spec[key] = self.read_field(key)
+        self._dirty.clear()
+        text = self.render(self.spec)
+        if text != self._text:
+            self._text = text
+            self.output.delete("1.0", "end")
+            self.output.insert("1.0", text)
+            if self.on_text: self.on_text(text)
+
+
+class VirtualList(tk.Frame):
+    """
+    Liste virtualisée : le Listbox ne contient que les `height` lignes visibles.
+    row_text(i) fournit le texte de la ligne i ; refresh() après tout changement de données.
+    La sélection est un index absolu (selected), indépendant de la fenêtre affichée.
+    """
+    def __init__(self, parent, row_text, count=0, height=10):
+        super().__init__(parent, bg=WHITE)
+        self.row_text = row_text
+        self.count = count
+        self.height = height
+        self.top = 0
+        self.selected = None
+        self.listbox = tk.Listbox(self, height=height, activestyle="dotbox", exportselection=False)
+        self.vscroll = tk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.listbox.pack(side="left", fill="both", expand=True)
+        self.vscroll.pack(side="right", fill="y")
+        self.listbox.bind("<<ListboxSelect>>", self._on_select)
+        for seq, step in (("<MouseWheel>", None), ("<Button-4>", -1), ("<Button-5>", 1)):
+            self.listbox.bind(seq, lambda e, s=step: self._on_wheel(e, s))
+
+    # ---------- données ----------
+    def set_count(self, count, redraw=True):
+        """Nouveau nombre de lignes ; redraw=False ne met à jour que la barre de défilement."""
+        self.count = count
+        if self.selected is not None and self.selected >= count:
+            self.selected = count - 1 if count else None
+        top = max(0, min(self.top, count - self.height))
+        if redraw or top != self.top:
+            self.top = top
+            self.refresh()
+        else:
+            self.vscroll.set(self.top / count if count else 0, min(count, self.top + self.height) / count if count else 1)
+
+    def visible(self, idx):
+        return idx < self.top + self.height
+
+    def refresh(self):
+        lb = self.listbox
+        stop = min(self.count, self.top + self.height)
+        lb.delete(0, "end")
+        if stop > self.top:
+            lb.insert("end", *[self.row_text(i) for i in range(self.top, stop)])
+        if self.selected is not None and self.top <= self.selected < stop:
+            lb.selection_set(self.selected - self.top); lb.activate(self.selected - self.top)
+        if self.count:
+            self.vscroll.set(self.top / self.count, stop / self.count)
+        else:
+            self.vscroll.set(0, 1)
+
+    # ---------- sélection / défilement ----------
+    def select(self, idx):
+        self.selected = idx
+        self.see(idx)
+        self.event_generate("<<VirtualListSelect>>")
+
+    def see(self, idx):
+        if idx is None: return
+        if idx < self.top:                      self.top = idx
+        elif idx >= self.top + self.height:     self.top = idx - self.height + 1
+        self.refresh()
+
+    def scroll_to(self, top):
+        self.top = max(0, min(int(top), self.count - self.height))
+        self.refresh()
+
+    def _on_select(self, _event=None):
+        sel = self.listbox.curselection()
+        if sel:
+            self.selected = self.top + int(sel[0])
+            self.event_generate("<<VirtualListSelect>>")
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to(float(args[1]) * self.count)
+        elif args[0] == "scroll":
+            n = int(args[1]) * (self.height if args[2] == "pages" else 1)
+            self.scroll_to(self.top + n)
+
+    def _on_wheel(self, event, step):
+        if step is None: step = -1 if getattr(event, "delta", 0) > 0 else 1
+        self.scroll_to(self.top + 3 * step)
+        return "break"
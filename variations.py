@@ -0,0 +1,89 @@
+# variations.py
+"""
+Variantes par membre du roster, régénérées depuis le spec stocké sur l'item (sans repasser par l'onglet source).
+
+    mv = MemberVariations(styles_map)
+    mv.text(item["spec"], j, seed)       -> texte de la variante j (0 = spec tel quel)
+    build_group_variations(spec, items, styles_map, k, seed, mv) -> k listes de lignes de groupe
+
+Seuls la pose, le regard, l'expression et le cadrage changent. Les textes sont mémorisés
+par empreinte de spec : régénérer la scène ne reconstruit pas les membres inchangés.
+"""
+import hashlib
+import json
+import random
+from collections import OrderedDict
+
+from engine import STYLES, build_group_lines
+from promptcache import character_prompt, monster_prompt
+from vocab import VOCAB
+
+VARY_FIELDS = {
+    "character": ("Pose / Action Beat", "Gaze Direction", "Facial Expression", "Framing"),
+    "monster": ("Pose", "Framing"),
+}
+
+
+def spec_hash(spec):
+    """Empreinte stable d'un spec (ordre des clés indifférent)."""
+    raw = json.dumps(spec, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(raw.encode(), digest_size=12).hexdigest()
+
+def _options(kind, key):
+    """(options, is_multi) d'un champ."""
+    multi = VOCAB.multi(kind)
+    if key in multi: return multi[key], True
+    return VOCAB.single(kind).get(key, ()), False
+
+def vary_spec(spec, j, seed=0, h=None):
+    """Variante j du spec : une autre valeur pour chaque champ de VARY_FIELDS (déterministe)."""
+    if not j: return spec
+    kind = spec.get("kind", "character")
+    rng = random.Random(f"{h or spec_hash(spec)}:{seed}:{j}")
+    out = dict(spec)
+    for key in VARY_FIELDS.get(kind, ()):
+        options, multi = _options(kind, key)
+        cur = spec.get(key)
+        choices = [o for o in options if o not in (cur or [] if multi else [cur])]
+        if choices:
+            v = rng.choice(choices)
+            out[key] = [v] if multi else v
+    return out
+
+
+class MemberVariations:
+    """Cache LRU (empreinte du spec, j, seed) -> texte ; compteurs hits/misses comme SectionRenderer."""
+    def __init__(self, styles_map=STYLES, maxsize=4096):
+        self.styles_map = styles_map
+        self.maxsize = maxsize
+        self._memo = OrderedDict()
+        self.hits = self.misses = 0
+
+    def text(self, spec, j, seed=0, h=None):
+        h = h or spec_hash(spec)
+        key = (h, j, seed)
+        text = self._memo.get(key)
+        if text is not None:
+            self.hits += 1
+            self._memo.move_to_end(key)
+            return text
+        self.misses += 1
+        v = vary_spec(spec, j, seed, h)
+        build = monster_prompt if spec.get("kind") == "monster" else character_prompt
+        text = self._memo[key] = build(v, self.styles_map)
+        if len(self._memo) > self.maxsize: self._memo.popitem(last=False)
+        return text
+
+
+def build_group_variations(spec, items, styles_map, k, seed=0, variations=None):
+    """
+    k versions du prompt de groupe : la version j utilise la variante j de chaque membre qui a un spec
+    (version 0 = textes d'origine). Les membres sans spec gardent leur texte.
+    """
+    mv = variations or MemberVariations(styles_map)
+    hashes = [spec_hash(it["spec"]) if k > 1 and it.get("spec") else None for it in items]
+    out = [build_group_lines(spec, items, styles_map)]
+    for j in range(1, k):
+        members = [dict(it, text=mv.text(it["spec"], j, seed, h)) if h else it for it, h in zip(items, hashes)]
+        out.append(build_group_lines(spec, members, styles_map))
+    return out
@@ -0,0 +1,138 @@
+# vocab.py
+"""
+Vocabulaires des formulaires (options de chaque champ, presets de race), sans Tk.
+
+    VOCAB.single("character")        -> {champ: (options, ...)}   ordre d'affichage
+    VOCAB.multi("monster")           -> {champ: (options, ...)}
+    VOCAB.options("group", "location")
+    VOCAB.folded(value)              -> forme de comparaison (sans accents, minuscules)
+    VOCAB.race_presets               -> {race: {"lines": [...], "avoid": "..."}}
+
+Source : data/character.json, monster.json, group.json (un objet par champ :
+{"values": [...]} dans l'ordre voulu, "sort": true pour l'ordre alphabétique, "keys_of":
+"race_presets" pour les races ; une chaîne renvoie aux options d'un autre champ) et race_presets.json.
+
+Les vues triées et normalisées sont calculées une fois puis écrites dans __pycache__ (marshal) ;
+l'artefact porte l'empreinte des fichiers de données et de ce module, et n'est relu que si elle correspond.
+Un seul exemplaire en mémoire (VOCAB) : moteur, règles, formulaires et tirages partagent les mêmes tuples.
+"""
+import hashlib
+import marshal
+import os
+import unicodedata
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+KINDS = ("character", "monster", "group")
+_FILES = KINDS + ("race_presets",)
+_COMPILED = os.path.join(os.path.dirname(os.path.abspath(__file__)), "__pycache__", "vocab.compiled")
+
+
+# ---------- utils ----------
+def unaccent(s: str) -> str:
+    return "".join(ch for ch in unicodedata.normalize("NFD", s) if not unicodedata.combining(ch))
+
+def fold(s: str) -> str:
+    """Forme de comparaison : sans accents, casse ignorée."""
+    return unaccent(str(s)).casefold()
+
+def sorted_en(items):
+    return sorted(items, key=fold)
+
+def parse_custom_list(text: str):
+    """Champ "Other" : valeurs séparées par virgules, points-virgules ou retours à la ligne."""
+    if not text: return []
+    out = []
+    for token in text.replace(";", ",").replace("\n", ",").split(","):
+        t = token.strip()
+        if t: out.append(t)
+    return out
+
+
+# ---------- compilation ----------
+def _read_sources(data_dir):
+    raw = {}
+    for name in _FILES:
+        with open(os.path.join(data_dir, name + ".json"), "rb") as f:
+            raw[name] = f.read()
+    return raw
+
+def _digest(raw):
+    h = hashlib.blake2b(digest_size=16)
+    with open(__file__, "rb") as f:
+        h.update(f.read())                  # changer la compilation invalide aussi l'artefact
+    for name in _FILES:
+        h.update(name.encode() + b"\0" + raw[name] + b"\0")
+    return h.hexdigest()
+
+def compile_sources(raw, digest):
+    """Contenu des fichiers JSON -> dict compilé (tuples triés, formes normalisées)."""
+    import json
+    presets = json.loads(raw["race_presets"])
+    fields, folded = {}, {}
+    for kind in KINDS:
+        doc = json.loads(raw[kind])
+        fields[kind] = {}
+        for section in ("single", "multi"):
+            table = {}
+            for key, entry in doc.get(section, {}).items():
+                if isinstance(entry, str):
+                    table[key] = table.get(entry) or fields[kind]["single"][entry]
+                    continue
+                values = list(presets) if entry.get("keys_of") == "race_presets" else entry["values"]
+                for v in values:
+                    if v not in folded: folded[v] = fold(v)
+                table[key] = tuple(sorted(values, key=folded.__getitem__) if entry.get("sort") else values)
+            fields[kind][section] = table
+    return {"digest": digest, "fields": fields, "folded": folded, "race_presets": presets}
+
+def load(data_dir=DATA_DIR, compiled=_COMPILED):
+    """Vocabulary depuis l'artefact compilé s'il est à jour, sinon depuis les JSON (et réécrit l'artefact)."""
+    raw = _read_sources(data_dir)
+    digest = _digest(raw)
+    if compiled:
+        try:
+            with open(compiled, "rb") as f:
+                data = marshal.loads(f.read())
+            if data.get("digest") == digest:
+                return Vocabulary(data)
+        except (OSError, EOFError, ValueError, TypeError, AttributeError):
+            pass
+    data = compile_sources(raw, digest)
+    if compiled:
+        try:
+            os.makedirs(os.path.dirname(compiled), exist_ok=True)
+            tmp = f"{compiled}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                marshal.dump(data, f)
+            os.replace(tmp, compiled)
+        except OSError:
+            pass                            # dossier en lecture seule : on recompile à chaque lancement
+    return Vocabulary(data)
+
+
+# ---------- registre ----------
+class Vocabulary:
+    """Vue en lecture seule du dict compilé (les options sont des tuples partagés)."""
+    def __init__(self, data):
+        self.digest = data["digest"]
+        self.race_presets = data["race_presets"]
+        self._fields = data["fields"]
+        self._folded = data["folded"]
+
+    def single(self, kind):
+        return self._fields[kind]["single"]
+
+    def multi(self, kind):
+        return self._fields[kind]["multi"]
+
+    def options(self, kind, key):
+        f = self._fields[kind]
+        return f["single"].get(key) or f["multi"].get(key) or ()
+
+    def folded(self, value):
+        """Forme normalisée précalculée (calculée à la volée pour une valeur hors vocabulaire)."""
+        out = self._folded.get(value)
+        return fold(value) if out is None else out
+
+
+VOCAB = load()